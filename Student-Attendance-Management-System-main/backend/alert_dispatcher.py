@@ -0,0 +1,288 @@
+"""Background dispatcher for low-attendance email alerts.
+
+Alerts are queued and sent by a small pool of worker tasks. Each worker owns
+one SMTP session that it opens lazily and reuses for every message. A session
+left idle for IDLE_PROBE_AFTER seconds is checked with NOOP first, and
+reopened if the server has dropped it, so an idle timeout does not cost a
+retry. Failed sends are retried with exponential backoff.
+Every call to `submit` is a run with its own counters, kept in memory for
+the most recent runs. With a `store` (a callable returning a Mongo
+collection) each run's counters are also saved there as they change, so any
+worker can report on a run queued by another; they expire after
+ALERT_RUN_RETENTION_DAYS.
+
+smtplib is blocking, so each send runs in a thread. A worker only ever uses
+its own connection, so sessions are never shared between threads.
+
+For local testing point SMTP_HOST/SMTP_PORT at an aiosmtpd stand-in, e.g.
+`python -m aiosmtpd -n -l localhost:8025`, with SMTP_STARTTLS=false and
+SMTP_AUTH=false so no login is attempted.
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALERT_RUN_RETENTION_DAYS = 7
+
+
+class SMTPSettings:
+    def __init__(self, host: str, port: int, user: str = "", password: str = "", starttls: bool = True,
+                 timeout: float = 30.0, auth: bool = True):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.auth = auth
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        return cls(
+            host=os.environ.get("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.environ.get("SMTP_PORT", "587")),
+            user=os.environ.get("SMTP_USER", ""),
+            password=os.environ.get("SMTP_PASSWORD", ""),
+            starttls=os.environ.get("SMTP_STARTTLS", "true").lower() == "true",
+            timeout=float(os.environ.get("SMTP_TIMEOUT", "30")),
+            auth=os.environ.get("SMTP_AUTH", "true").lower() == "true",
+        )
+
+    @property
+    def configured(self) -> bool:
+        # Sending needs a password unless the server takes mail without a login
+        return bool(self.user and (self.password or not self.auth))
+
+
+def build_alert_message(from_email: str, to_email: str, student_name: str, subject_name: str, attendance_percentage: float, threshold: float = 75) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = f"Low Attendance Alert - {subject_name}"
+
+    body = f"""
+        Dear {student_name},
+
+        This is to inform you that your attendance in {subject_name} is currently at {attendance_percentage:.2f}%.
+
+        The minimum required attendance for exam eligibility is {threshold:g}%.
+
+        Please ensure regular attendance to maintain eligibility.
+
+        Regards,
+        Academic Department
+        """
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class AlertRun:
+    def __init__(self, total: int):
+        self.id = str(uuid.uuid4())
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.errors = []
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.sent + self.failed + self.skipped >= self.total
+
+    def _finish_if_done(self):
+        if self.done and self.finished_at is None:
+            self.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.id,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "pending": self.total - self.sent - self.failed - self.skipped,
+            "errors": self.errors,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class _Worker:
+    """One SMTP session, used from a single worker task"""
+
+    IDLE_PROBE_AFTER = 10.0
+
+    def __init__(self, settings: SMTPSettings):
+        self.settings = settings
+        self.smtp: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.settings.host, self.settings.port, timeout=self.settings.timeout)
+        try:
+            if self.settings.starttls:
+                smtp.starttls()
+            if self.settings.auth:
+                smtp.login(self.settings.user, self.settings.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.smtp = smtp
+
+    def _alive(self) -> bool:
+        try:
+            return self.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, msg: MIMEMultipart):
+        if self.smtp is not None and time.monotonic() - self.last_used >= self.IDLE_PROBE_AFTER and not self._alive():
+            self.close()
+        if self.smtp is None:
+            self._connect()
+        self.smtp.send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+        self.smtp = None
+
+
+class AlertDispatcher:
+    MAX_RUNS = 100
+    MAX_ERRORS_PER_RUN = 20
+
+    def __init__(self, settings: SMTPSettings, workers: int = 2, max_retries: int = 3, backoff: float = 1.0,
+                 store: Optional[Callable[[], Any]] = None):
+        self.settings = settings
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.store = store
+        self.runs: "OrderedDict[str, AlertRun]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work(_Worker(self.settings))) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """Wait until every queued alert has been handled"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def submit(self, alerts: Iterable[Tuple[str, str, str, float]], threshold: float = 75) -> AlertRun:
+        """Queue (to_email, student_name, subject_name, percentage) alerts as one run"""
+        alerts = list(alerts)
+        run = AlertRun(total=len(alerts))
+        self.runs[run.id] = run
+        while len(self.runs) > self.MAX_RUNS:
+            self.runs.popitem(last=False)
+
+        if not self.settings.configured or self._queue is None:
+            logger.warning("SMTP credentials not configured")
+            run.skipped = run.total
+            run._finish_if_done()
+            await self._save(run)
+            return run
+
+        run._finish_if_done()
+        await self._save(run)
+        for to_email, student_name, subject_name, percentage in alerts:
+            msg = build_alert_message(self.settings.user, to_email, student_name, subject_name, percentage, threshold)
+            self._queue.put_nowait((run, msg))
+        return run
+
+    def get_run(self, run_id: str) -> Optional[AlertRun]:
+        return self.runs.get(run_id)
+
+    async def run_status(self, run_id: str) -> Optional[dict]:
+        """A run's counters, from this process or, for another worker's run, the store"""
+        run = self.runs.get(run_id)
+        if run is not None:
+            return run.to_dict()
+        if self.store is None:
+            return None
+        return await self.store().find_one({"run_id": run_id}, {"_id": 0, "expires_at": 0})
+
+    async def _save(self, run: AlertRun):
+        if self.store is None:
+            return
+        expires_at = datetime.now(timezone.utc) + timedelta(days=ALERT_RUN_RETENTION_DAYS)
+        try:
+            await self.store().update_one(
+                {"run_id": run.id},
+                {"$set": {**run.to_dict(), "expires_at": expires_at}},
+                upsert=True
+            )
+        except Exception as e:
+            # The counters stay available from this process
+            logger.error(f"Failed to save alert run {run.id}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "runs": [run.to_dict() for run in reversed(self.runs.values())],
+        }
+
+    async def _work(self, worker: _Worker):
+        try:
+            while True:
+                run, msg = await self._queue.get()
+                try:
+                    await self._deliver(worker, run, msg)
+                finally:
+                    run._finish_if_done()
+                    await self._save(run)
+                    self._queue.task_done()
+        finally:
+            await asyncio.to_thread(worker.close)
+
+    async def _deliver(self, worker: _Worker, run: AlertRun, msg: MIMEMultipart):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(worker.send, msg)
+                run.sent += 1
+                logger.info(f"Email sent to {msg['To']}")
+                return
+            except Exception as e:
+                # Drop the session so the next attempt starts from a fresh connection
+                await asyncio.to_thread(worker.close)
+                if attempt == self.max_retries:
+                    run.failed += 1
+                    if len(run.errors) < self.MAX_ERRORS_PER_RUN:
+                        run.errors.append({"to": msg["To"], "error": str(e)})
+                    logger.error(f"Failed to send email: {str(e)}")
+                    return
+                run.retries += 1
+                await asyncio.sleep(self.backoff * (2 ** attempt))
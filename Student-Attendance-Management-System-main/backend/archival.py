@@ -0,0 +1,250 @@
+"""Archival of closed terms out of the hot attendance collections.
+
+Archiving a term moves its class sessions (`start <= date < end`) and their
+attendance records into `class_sessions_archive_<term>` and
+`attendance_records_archive_<term>`. These are created with the
+ARCHIVE_COMPRESSOR block compressor (zstd by default) and the same indexes as
+the hot collections. Once the move is done:
+
+- `attendance_term_stats` holds the term's counters in the `attendance_stats`
+  shape, plus a `term` field
+- the moved sessions and marks are subtracted from `attendance_stats` batch
+  by batch, so the hot collections and counters only describe open terms.
+  The counters are only ever changed with `$inc`, so marking in open terms
+  can carry on during the run
+- `archived_terms` records the term, its date range and what was moved
+
+Daily trend rollups are left as they are, and `rebuild_trends` keeps the
+days before the last archived term's end.
+
+Each batch of sessions is copied with upserts before it is deleted, so an
+interrupted run can be repeated; if it stopped between a delete and the
+counter update, `python attendance_stats.py` reports the drift. Run it once
+the term is closed: marks written to a term while it is being archived may be
+left behind.
+
+`term_collections` is the query router: it maps a term name to the
+collections holding its sessions and records, and `None` to the hot ones.
+
+Usage:
+    python archival.py 2025-odd 2025-06-01 2025-12-01   # archive a term
+    python archival.py --list                           # list archived terms
+"""
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import CollectionInvalid
+
+from attendance_stats import ATTENDANCE_STATUSES
+from indexes import REQUIRED_INDEXES, ensure_indexes
+
+TERM_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+ARCHIVE_BATCH_SIZE = 500
+
+
+class UnknownTerm(LookupError):
+    pass
+
+
+def archive_names(term: str) -> Tuple[str, str]:
+    if not TERM_PATTERN.match(term):
+        raise ValueError("Term names may only contain letters, digits, '-' and '_'")
+    return f"class_sessions_archive_{term}", f"attendance_records_archive_{term}"
+
+
+async def term_collections(db, term: Optional[str]):
+    """(sessions, records) collections for `term`, or the hot collections when it is None"""
+    if term is None:
+        return db.class_sessions, db.attendance_records
+    if not TERM_PATTERN.match(term) or not await db.archived_terms.find_one({"term": term, "status": "archived"}):
+        raise UnknownTerm(term)
+    sessions, records = archive_names(term)
+    return db[sessions], db[records]
+
+
+async def archived_cutoff(db) -> Optional[str]:
+    """End of the latest archived term; days before it only exist in the archives"""
+    latest = await db.archived_terms.find({"status": "archived"}, {"_id": 0, "end": 1}).sort("end", -1).to_list(1)
+    return latest[0]["end"] if latest else None
+
+
+async def list_terms(db) -> list:
+    return await db.archived_terms.find({}, {"_id": 0}).sort("start", 1).to_list(None)
+
+
+async def get_term_subject_stats(db, term: str, subject_id: str) -> Tuple[int, Dict[str, int]]:
+    """Same as get_subject_stats, from an archived term's counters"""
+    total_sessions = 0
+    present = {}
+    async for doc in db.attendance_term_stats.find({"term": term, "subject_id": subject_id}, {"_id": 0}):
+        if doc["student_id"] is None:
+            total_sessions = doc.get("total_sessions", 0)
+        else:
+            present[doc["student_id"]] = doc.get("present", 0)
+    return total_sessions, present
+
+
+async def get_student_history(db, student_id: str) -> list:
+    """A student's per-subject counts in every archived term, with subject totals"""
+    rows = await db.attendance_term_stats.find({"student_id": student_id}, {"_id": 0}).to_list(None)
+    if not rows:
+        return []
+    totals = {
+        (doc["term"], doc["subject_id"]): doc.get("total_sessions", 0)
+        async for doc in db.attendance_term_stats.find({
+            "term": {"$in": list({row["term"] for row in rows})},
+            "subject_id": {"$in": list({row["subject_id"] for row in rows})},
+            "student_id": None,
+        }, {"_id": 0})
+    }
+    for row in rows:
+        row["total_sessions"] = totals.get((row["term"], row["subject_id"]), 0)
+    return rows
+
+
+async def _create_archive(db, name: str):
+    if name in await db.list_collection_names(filter={"name": name}):
+        return
+    compressor = os.environ.get("ARCHIVE_COMPRESSOR", "zstd")
+    try:
+        await db.create_collection(name, storageEngine={"wiredTiger": {"configString": f"block_compressor={compressor}"}})
+    except CollectionInvalid:
+        pass
+
+
+async def _copy(collection, docs: list):
+    if docs:
+        await collection.bulk_write([ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs], ordered=False)
+
+
+async def _release(db, session_docs: list, record_docs: list):
+    """Take moved sessions and marks out of the live counters"""
+    increments: Dict[Tuple[str, Optional[str]], Dict[str, int]] = {}
+    for doc in session_docs:
+        counts = increments.setdefault((doc["subject_id"], None), {})
+        counts["total_sessions"] = counts.get("total_sessions", 0) - 1
+    for doc in record_docs:
+        if doc.get("status") not in ATTENDANCE_STATUSES:
+            continue
+        counts = increments.setdefault((doc["subject_id"], doc["student_id"]), {})
+        counts[doc["status"]] = counts.get(doc["status"], 0) - 1
+
+    if increments:
+        await db.attendance_stats.bulk_write([
+            UpdateOne({"subject_id": subject_id, "student_id": student_id}, {"$inc": counts})
+            for (subject_id, student_id), counts in increments.items()
+        ], ordered=False)
+
+
+async def _summarize(db, term: str, sessions, records) -> int:
+    docs = []
+    async for row in sessions.aggregate([{"$group": {"_id": "$subject_id", "total_sessions": {"$sum": 1}}}]):
+        docs.append({"term": term, "subject_id": row["_id"], "student_id": None, "total_sessions": row["total_sessions"]})
+    async for row in records.aggregate([
+        {"$match": {"status": {"$in": list(ATTENDANCE_STATUSES)}}},
+        {"$group": {
+            "_id": {"subject_id": "$subject_id", "student_id": "$student_id"},
+            **{status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}} for status in ATTENDANCE_STATUSES}
+        }}
+    ], allowDiskUse=True):
+        docs.append({
+            "term": term, **row["_id"],
+            **{status: row[status] for status in ATTENDANCE_STATUSES},
+        })
+
+    await db.attendance_term_stats.delete_many({"term": term})
+    if docs:
+        await db.attendance_term_stats.insert_many(docs, ordered=False)
+    return len(docs)
+
+
+async def archive_term(db, term: str, start: str, end: str, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    sessions_name, records_name = archive_names(term)
+    if not (DATE_PATTERN.match(start) and DATE_PATTERN.match(end)) or start >= end:
+        raise ValueError("Term start and end must be YYYY-MM-DD dates, start first")
+    existing = await db.archived_terms.find_one({"term": term}, {"_id": 0})
+    if existing and existing["status"] == "archived":
+        raise ValueError(f"Term {term} is already archived")
+    if existing and (existing["start"], existing["end"]) != (start, end):
+        raise ValueError(f"Term {term} was started with {existing['start']} - {existing['end']}")
+
+    await db.archived_terms.update_one(
+        {"term": term},
+        {"$set": {"term": term, "start": start, "end": end, "status": "archiving",
+                  "started_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+    for name in (sessions_name, records_name):
+        await _create_archive(db, name)
+    await ensure_indexes(db, {
+        sessions_name: REQUIRED_INDEXES["class_sessions"],
+        records_name: REQUIRED_INDEXES["attendance_records"],
+    })
+    sessions, records = db[sessions_name], db[records_name]
+
+    # Ids first, so the batches below do not rescan the collection as it shrinks
+    session_ids = [
+        doc["id"] async for doc in db.class_sessions.find({"date": {"$gte": start, "$lt": end}}, {"_id": 0, "id": 1})
+    ]
+    moved_sessions = moved_records = 0
+    for i in range(0, len(session_ids), batch_size):
+        ids = session_ids[i:i + batch_size]
+        session_docs = await db.class_sessions.find({"id": {"$in": ids}}, {"_id": 0}).to_list(None)
+        record_docs = await db.attendance_records.find({"session_id": {"$in": ids}}, {"_id": 0}).to_list(None)
+        await _copy(sessions, session_docs)
+        await _copy(records, record_docs)
+        # Only what was copied is deleted, and only what was deleted is taken out of the counters
+        await db.attendance_records.delete_many({"id": {"$in": [doc["id"] for doc in record_docs]}})
+        await db.class_sessions.delete_many({"id": {"$in": ids}})
+        await _release(db, session_docs, record_docs)
+        moved_sessions += len(session_docs)
+        moved_records += len(record_docs)
+
+    counters = await _summarize(db, term, sessions, records)
+
+    summary = {
+        "sessions": await sessions.count_documents({}),
+        "records": await records.count_documents({}),
+        "counters": counters,
+    }
+    await db.archived_terms.update_one(
+        {"term": term},
+        {"$set": {**summary, "status": "archived", "archived_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return {"term": term, "moved_sessions": moved_sessions, "moved_records": moved_records, **summary}
+
+
+async def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[os.environ.get("DB_NAME", "attendance_system")]
+
+    try:
+        await ensure_indexes(db)
+        if sys.argv[1:] == ["--list"]:
+            for term in await list_terms(db):
+                print(f"{term['term']}: {term['start']} - {term['end']}, {term['status']}, "
+                      f"{term.get('sessions', 0)} sessions, {term.get('records', 0)} records")
+            return 0
+        if len(sys.argv) != 4:
+            print(__doc__)
+            return 2
+        result = await archive_term(db, *sys.argv[1:4])
+        print(f"Archived {result['term']}: moved {result['moved_sessions']} sessions and "
+              f"{result['moved_records']} records, {result['counters']} counters kept")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
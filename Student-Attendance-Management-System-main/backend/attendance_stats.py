@@ -0,0 +1,197 @@
+"""Materialized attendance counters.
+
+`attendance_stats` holds one document per (student_id, subject_id) with
+`present`/`absent` counts, plus one document per subject with
+`student_id: None` carrying `total_sessions`. The write paths keep them in
+step with `$inc`; `rebuild_stats` recomputes them from the raw collections.
+A database that has sessions but no counters yet is backfilled once at
+startup by `ensure_stats`.
+
+Usage:
+    python attendance_stats.py            # report drift only
+    python attendance_stats.py --rebuild  # report drift and rewrite counters
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
+
+from indexes import ensure_indexes
+from migrations import run_once
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_STATUSES = ("present", "absent")
+
+
+async def record_session(db, subject_id: str, count: int = 1):
+    await db.attendance_stats.update_one(
+        {"subject_id": subject_id, "student_id": None},
+        {"$inc": {"total_sessions": count}},
+        upsert=True
+    )
+
+
+async def record_marks(db, subject_id: str, marks: Iterable[Tuple[str, str]]):
+    """Count newly inserted (student_id, status) marks for a subject"""
+    increments: Dict[str, Dict[str, int]] = {}
+    for student_id, status in marks:
+        if status not in ATTENDANCE_STATUSES:
+            continue
+        counts = increments.setdefault(student_id, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    if not increments:
+        return
+    await db.attendance_stats.bulk_write([
+        UpdateOne(
+            {"subject_id": subject_id, "student_id": student_id},
+            {"$inc": counts},
+            upsert=True
+        )
+        for student_id, counts in increments.items()
+    ], ordered=False)
+
+
+async def record_status_change(db, subject_id: str, student_id: str, old_status: str, new_status: str):
+    increments = {}
+    if old_status in ATTENDANCE_STATUSES:
+        increments[old_status] = -1
+    if new_status in ATTENDANCE_STATUSES:
+        increments[new_status] = increments.get(new_status, 0) + 1
+    if not increments:
+        return
+    await db.attendance_stats.update_one(
+        {"subject_id": subject_id, "student_id": student_id},
+        {"$inc": increments},
+        upsert=True
+    )
+
+
+async def get_subject_stats(db, subject_id: str) -> Tuple[int, Dict[str, int]]:
+    """Total sessions and present count per student for one subject"""
+    total_sessions = 0
+    present = {}
+    async for doc in db.attendance_stats.find({"subject_id": subject_id}, {"_id": 0}):
+        if doc["student_id"] is None:
+            total_sessions = doc.get("total_sessions", 0)
+        else:
+            present[doc["student_id"]] = doc.get("present", 0)
+    return total_sessions, present
+
+
+async def get_student_stats(db, student_id: str, subject_ids) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Total sessions and the student's present count per subject"""
+    totals = {}
+    present = {}
+    async for doc in db.attendance_stats.find(
+        {"subject_id": {"$in": list(subject_ids)}, "student_id": {"$in": [None, student_id]}},
+        {"_id": 0}
+    ):
+        if doc["student_id"] is None:
+            totals[doc["subject_id"]] = doc.get("total_sessions", 0)
+        else:
+            present[doc["subject_id"]] = doc.get("present", 0)
+    return totals, present
+
+
+async def _expected_stats(db) -> Dict[Tuple[str, str], dict]:
+    expected = {}
+    async for row in db.class_sessions.aggregate([
+        {"$group": {"_id": "$subject_id", "total_sessions": {"$sum": 1}}}
+    ]):
+        expected[(row["_id"], None)] = {"total_sessions": row["total_sessions"]}
+
+    async for row in db.attendance_records.aggregate([
+        {"$match": {"status": {"$in": list(ATTENDANCE_STATUSES)}}},
+        {"$group": {
+            "_id": {"subject_id": "$subject_id", "student_id": "$student_id"},
+            **{status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}} for status in ATTENDANCE_STATUSES}
+        }}
+    ]):
+        key = (row["_id"]["subject_id"], row["_id"]["student_id"])
+        expected[key] = {status: row[status] for status in ATTENDANCE_STATUSES}
+    return expected
+
+
+def _counters(doc: dict) -> dict:
+    fields = ("total_sessions",) if doc.get("student_id") is None else ATTENDANCE_STATUSES
+    return {field: doc.get(field, 0) for field in fields}
+
+
+async def rebuild_stats(db, apply: bool = False) -> dict:
+    """Recompute counters from raw records, report drift and optionally rewrite them.
+
+    Writes that land while a rebuild runs can be overwritten, so run it with
+    marking quiesced or follow it with a second verify pass.
+    """
+    expected = await _expected_stats(db)
+    actual = {}
+    async for doc in db.attendance_stats.find({}, {"_id": 0}):
+        actual[(doc["subject_id"], doc.get("student_id"))] = _counters(doc)
+
+    drift = []
+    for key in expected.keys() | actual.keys():
+        want = expected.get(key)
+        have = actual.get(key)
+        # A counter doc with all zeros is equivalent to a missing one
+        if want is None and have is not None and not any(have.values()):
+            continue
+        if want != have:
+            drift.append({"subject_id": key[0], "student_id": key[1], "expected": want, "actual": have})
+    stale = [key for key in actual if key not in expected]
+
+    if apply:
+        ops = [
+            ReplaceOne(
+                {"subject_id": subject_id, "student_id": student_id},
+                {"subject_id": subject_id, "student_id": student_id, **counters},
+                upsert=True
+            )
+            for (subject_id, student_id), counters in expected.items()
+        ]
+        if ops:
+            await db.attendance_stats.bulk_write(ops, ordered=False)
+        for subject_id, student_id in stale:
+            await db.attendance_stats.delete_one({"subject_id": subject_id, "student_id": student_id})
+
+    return {"checked": len(expected), "drifted": len(drift), "drift": drift, "rebuilt": apply}
+
+
+async def ensure_stats(db) -> bool:
+    """Backfill the counters of a database that has sessions but none yet.
+
+    Every worker calls this at startup; one of them runs the rebuild under the
+    migration lock while the others stay not ready until it is done.
+    """
+    async def needed():
+        return (await db.attendance_stats.estimated_document_count() == 0
+                and await db.class_sessions.estimated_document_count() > 0)
+
+    return await run_once(db, "attendance_stats_backfill", needed, lambda: rebuild_stats(db, apply=True))
+
+
+async def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[os.environ.get("DB_NAME", "attendance_system")]
+
+    apply = "--rebuild" in sys.argv
+    await ensure_indexes(db)
+    result = await rebuild_stats(db, apply=apply)
+    for item in result["drift"][:50]:
+        print(f"  {item['subject_id']} / {item['student_id']}: expected {item['expected']}, actual {item['actual']}")
+    print(f"Checked {result['checked']} counters, {result['drifted']} drifted" + (", rebuilt" if apply else ""))
+
+    client.close()
+    return 1 if result["drifted"] and not apply else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,273 @@
+"""Daily attendance rollups for trend charts.
+
+`attendance_daily` holds one document per (subject_id, day) with `sessions`,
+`present` and `absent` counts, plus the subject's `course_id` and
+`department_id` so course and department series are a single indexed
+aggregation. `student_attendance_daily` holds one document per
+(student_id, day) with that student's marks across all subjects. Both carry
+`week`, the Monday of the ISO week, for weekly series.
+
+`ClassSession.date` is a free-form ISO string, so days are bucketed from its
+first ten characters; sessions with an unparseable date are left out.
+
+Usage:
+    python attendance_trends.py   # rebuild both rollups from raw records
+"""
+import asyncio
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from archival import archived_cutoff
+from attendance_stats import ATTENDANCE_STATUSES
+from indexes import ensure_indexes
+from migrations import run_once
+
+TREND_SCOPES = {
+    "subject": ("attendance_daily", "subject_id"),
+    "course": ("attendance_daily", "course_id"),
+    "department": ("attendance_daily", "department_id"),
+    "student": ("student_attendance_daily", "student_id"),
+}
+GRANULARITY_FIELDS = {"daily": "day", "weekly": "week"}
+REBUILD_BATCH_SIZE = 5000
+
+# subject_id -> (course_id, department_id); subjects never move between courses
+_subject_scopes: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+
+def bucket_date(value) -> Optional[Tuple[str, str]]:
+    """(day, week) for an ISO date or datetime string, or None if it does not parse"""
+    try:
+        day = date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+    week = day - timedelta(days=day.weekday())
+    return day.isoformat(), week.isoformat()
+
+
+async def _subject_scope(db, subject_id: str) -> Tuple[Optional[str], Optional[str]]:
+    if subject_id not in _subject_scopes:
+        subject = await db.subjects.find_one({"id": subject_id}, {"_id": 0, "course_id": 1})
+        if not subject:
+            # Unknown subjects are not cached so a later insert is picked up
+            return None, None
+        course = await db.courses.find_one({"id": subject.get("course_id")}, {"_id": 0, "department_id": 1})
+        _subject_scopes[subject_id] = (subject.get("course_id"), course.get("department_id") if course else None)
+    return _subject_scopes[subject_id]
+
+
+async def _subject_update(db, session: dict, increments: dict) -> Optional[UpdateOne]:
+    buckets = bucket_date(session.get("date"))
+    if not buckets:
+        return None
+    day, week = buckets
+    course_id, department_id = await _subject_scope(db, session["subject_id"])
+    return UpdateOne(
+        {"subject_id": session["subject_id"], "day": day},
+        {"$inc": increments, "$set": {"week": week, "course_id": course_id, "department_id": department_id}},
+        upsert=True
+    )
+
+
+async def record_trend_session(db, session: dict):
+    operation = await _subject_update(db, session, {"sessions": 1})
+    if operation:
+        await db.attendance_daily.bulk_write([operation])
+
+
+async def record_trend_marks(db, session: dict, marks: Iterable[Tuple[str, str]]):
+    """Count newly inserted (student_id, status) marks for one session"""
+    buckets = bucket_date(session.get("date"))
+    if not buckets:
+        return
+    day, week = buckets
+
+    totals: Dict[str, int] = {}
+    per_student: Dict[str, Dict[str, int]] = {}
+    for student_id, status in marks:
+        if status not in ATTENDANCE_STATUSES:
+            continue
+        totals[status] = totals.get(status, 0) + 1
+        counts = per_student.setdefault(student_id, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    if not totals:
+        return
+    await db.attendance_daily.bulk_write([await _subject_update(db, session, totals)])
+    await db.student_attendance_daily.bulk_write([
+        UpdateOne(
+            {"student_id": student_id, "day": day},
+            {"$inc": counts, "$set": {"week": week}},
+            upsert=True
+        )
+        for student_id, counts in per_student.items()
+    ], ordered=False)
+
+
+async def record_trend_status_change(db, session: dict, student_id: str, old_status: str, new_status: str):
+    buckets = bucket_date(session.get("date"))
+    if not buckets:
+        return
+    increments = {}
+    if old_status in ATTENDANCE_STATUSES:
+        increments[old_status] = -1
+    if new_status in ATTENDANCE_STATUSES:
+        increments[new_status] = increments.get(new_status, 0) + 1
+    if not increments:
+        return
+    day, week = buckets
+    await db.attendance_daily.bulk_write([await _subject_update(db, session, increments)])
+    await db.student_attendance_daily.update_one(
+        {"student_id": student_id, "day": day},
+        {"$inc": increments, "$set": {"week": week}},
+        upsert=True
+    )
+
+
+async def get_trend(db, scope: str, scope_id: str, granularity: str = "daily",
+                    start: Optional[str] = None, end: Optional[str] = None) -> list:
+    """Present-rate series for one scope, oldest period first"""
+    collection, field = TREND_SCOPES[scope]
+    match = {field: scope_id}
+    if start or end:
+        match["day"] = {}
+        if start:
+            match["day"]["$gte"] = start
+        if end:
+            match["day"]["$lte"] = end
+
+    group = {
+        "_id": f"${GRANULARITY_FIELDS[granularity]}",
+        **{status: {"$sum": f"${status}"} for status in ATTENDANCE_STATUSES},
+    }
+    if collection == "attendance_daily":
+        group["sessions"] = {"$sum": "$sessions"}
+
+    series = []
+    async for row in db[collection].aggregate([{"$match": match}, {"$group": group}, {"$sort": {"_id": 1}}]):
+        marked = row["present"] + row["absent"]
+        point = {"period": row.pop("_id"), **row, "present_rate": round(row["present"] / marked * 100, 2) if marked else None}
+        series.append(point)
+    return series
+
+
+async def _write_batches(collection, docs) -> int:
+    """insert_many an async iterable of documents in fixed-size batches"""
+    written = 0
+    batch = []
+    async for doc in docs:
+        batch.append(doc)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+async def rebuild_trends(db) -> dict:
+    """Recompute both rollups from class_sessions and attendance_records.
+
+    Marks written while this runs can be lost, so run it with marking quiesced.
+    """
+    departments = {}
+    async for course in db.courses.find({}, {"_id": 0, "id": 1, "department_id": 1}):
+        departments[course["id"]] = course.get("department_id")
+    scopes = {}
+    async for subject in db.subjects.find({}, {"_id": 0, "id": 1, "course_id": 1}):
+        scopes[subject["id"]] = (subject.get("course_id"), departments.get(subject.get("course_id")))
+
+    # Days before the last archived term's end are kept, their records are gone
+    cutoff = await archived_cutoff(db)
+
+    session_days = {}
+    subject_days: Dict[Tuple[str, str], dict] = {}
+    async for session in db.class_sessions.find({}, {"_id": 0, "id": 1, "subject_id": 1, "date": 1}):
+        buckets = bucket_date(session.get("date"))
+        if not buckets or (cutoff and buckets[0] < cutoff):
+            continue
+        session_days[session["id"]] = (session["subject_id"], buckets)
+        key = (session["subject_id"], buckets[0])
+        if key not in subject_days:
+            course_id, department_id = scopes.get(session["subject_id"], (None, None))
+            subject_days[key] = {
+                "subject_id": session["subject_id"], "day": buckets[0], "week": buckets[1],
+                "course_id": course_id, "department_id": department_id,
+                "sessions": 0, "present": 0, "absent": 0,
+            }
+        subject_days[key]["sessions"] += 1
+
+    # Subject totals only need counts per session, not one row per mark
+    async for row in db.attendance_records.aggregate([
+        {"$match": {"status": {"$in": list(ATTENDANCE_STATUSES)}}},
+        {"$group": {"_id": {"session_id": "$session_id", "status": "$status"}, "count": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        found = session_days.get(row["_id"]["session_id"])
+        if found:
+            subject_id, (day, _) = found
+            subject_days[(subject_id, day)][row["_id"]["status"]] += row["count"]
+
+    student_pipeline = [
+        {"$match": {"status": {"$in": list(ATTENDANCE_STATUSES)}}},
+        {"$lookup": {"from": "class_sessions", "localField": "session_id", "foreignField": "id", "as": "session"}},
+        {"$unwind": "$session"},
+        {"$group": {
+            "_id": {"student_id": "$student_id", "day": {"$substrCP": ["$session.date", 0, 10]}},
+            **{status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}} for status in ATTENDANCE_STATUSES}
+        }}
+    ]
+
+    async def subject_docs():
+        for doc in subject_days.values():
+            yield doc
+
+    async def student_docs():
+        async for row in db.attendance_records.aggregate(student_pipeline, allowDiskUse=True):
+            buckets = bucket_date(row["_id"]["day"])
+            if buckets and not (cutoff and buckets[0] < cutoff):
+                yield {
+                    "student_id": row["_id"]["student_id"], "day": buckets[0], "week": buckets[1],
+                    **{status: row[status] for status in ATTENDANCE_STATUSES},
+                }
+
+    rebuilt = {"day": {"$gte": cutoff}} if cutoff else {}
+    await db.attendance_daily.delete_many(rebuilt)
+    subject_count = await _write_batches(db.attendance_daily, subject_docs())
+    await db.student_attendance_daily.delete_many(rebuilt)
+    student_count = await _write_batches(db.student_attendance_daily, student_docs())
+
+    _subject_scopes.clear()
+    return {"subject_days": subject_count, "student_days": student_count}
+
+
+async def ensure_trends(db) -> bool:
+    """Build the rollups of a database that has sessions but none yet, once, under the migration lock"""
+    async def needed():
+        return (await db.attendance_daily.estimated_document_count() == 0
+                and await db.class_sessions.estimated_document_count() > 0)
+
+    return await run_once(db, "attendance_trends_backfill", needed, lambda: rebuild_trends(db))
+
+
+async def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[os.environ.get("DB_NAME", "attendance_system")]
+
+    await ensure_indexes(db)
+    result = await rebuild_trends(db)
+    print(f"Rebuilt {result['subject_days']} subject-days and {result['student_days']} student-days")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
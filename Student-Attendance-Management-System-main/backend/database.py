@@ -0,0 +1,61 @@
+"""Mongo client construction, pool warmup and health checks.
+
+Pool settings come from the environment so each uvicorn worker's share of
+the server's connections can be sized explicitly:
+
+    MONGO_MAX_POOL_SIZE                 connections per worker (default 100)
+    MONGO_MIN_POOL_SIZE                 connections opened before the worker is ready (default 10)
+    MONGO_MAX_CONNECTING                connections being established at once (default 2)
+    MONGO_MAX_IDLE_TIME_MS              close connections idle this long (default 0, never)
+    MONGO_CONNECT_TIMEOUT_MS            default 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   default 5000
+    MONGO_SOCKET_TIMEOUT_MS             default 0, no timeout
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         wait for a free connection this long (default 0, forever)
+
+`MONGO_MAX_CONNECTING` is what keeps a traffic spike from turning into a
+connection storm. Requests beyond the pool wait for a free connection instead
+of all dialing the server at once.
+"""
+import asyncio
+import os
+from typing import List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+POOL_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", "100"),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", "10"),
+    "maxConnecting": ("MONGO_MAX_CONNECTING", "2"),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_TIME_MS", "0"),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", "5000"),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", "0"),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"),
+}
+
+
+def pool_options() -> dict:
+    options = {}
+    for option, (variable, default) in POOL_OPTIONS.items():
+        value = int(os.environ.get(variable, default))
+        # Zero means "no limit" for the timeouts; pymongo spells that None
+        if value or option in ("minPoolSize", "maxPoolSize"):
+            options[option] = value
+    return options
+
+
+def create_client(mongo_url: str, event_listeners: List) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(mongo_url, event_listeners=event_listeners, **pool_options())
+
+
+async def warm_pool(client: AsyncIOMotorClient, connections: int):
+    """Check out up to `connections` pooled connections now instead of on the first requests"""
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(connections, 1))))
+
+
+async def ping(client: AsyncIOMotorClient, timeout: float = 2.0) -> bool:
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout)
+        return True
+    except Exception:
+        return False
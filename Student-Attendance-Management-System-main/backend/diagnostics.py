@@ -0,0 +1,230 @@
+"""Opt-in per-request Mongo diagnostics.
+
+An admin who sends `X-Diagnostics: 1` gets the JSON response wrapped as
+`{"response": ..., "diagnostics": {...}}`. The diagnostics block lists every
+Mongo operation the request issued, with its duration, the explain() winning
+plan (COLLSCAN vs IXSCAN) and documents examined vs. returned.
+
+Without the header, or with a value other than 1/true/yes/on, the middleware
+passes the request straight through. The command listener and
+get_current_user then do a single context-variable lookup each and nothing
+else. Responses for non-admins and anything that is not `application/json`
+(event streams, NDJSON, CSV/XLSX exports) are forwarded as they are produced;
+only an admin's JSON response is buffered to be wrapped.
+"""
+import contextvars
+import json
+import time
+from typing import Optional
+
+from pymongo import monitoring
+
+DIAGNOSTICS_HEADER = b"x-diagnostics"
+ENABLED_VALUES = {b"1", b"true", b"yes", b"on"}
+MAX_OPERATIONS = 500
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session and transport fields that explain() must not receive
+_STRIP_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+
+class DiagnosticsContext:
+    def __init__(self):
+        self.role = None
+        self.operations = []
+        self.pending = {}
+        self.started = time.perf_counter()
+
+
+current_diagnostics: contextvars.ContextVar[Optional[DiagnosticsContext]] = contextvars.ContextVar("current_diagnostics", default=None)
+
+
+def note_user(user: dict):
+    """Record who is asking, so diagnostics are only returned to admins"""
+    context = current_diagnostics.get()
+    if context is not None:
+        context.role = user.get("role")
+
+
+def _returned(command_name: str, reply: dict) -> Optional[int]:
+    if "cursor" in reply:
+        cursor = reply["cursor"]
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if command_name == "count":
+        return reply.get("n")
+    if command_name == "distinct":
+        return len(reply.get("values", []))
+    if command_name in ("update", "delete", "insert"):
+        return reply.get("n")
+    return None
+
+
+class DiagnosticsListener(monitoring.CommandListener):
+    def started(self, event):
+        context = current_diagnostics.get()
+        if context is None or len(context.operations) + len(context.pending) >= MAX_OPERATIONS:
+            return
+        command = {k: v for k, v in event.command.items() if not k.startswith("$") and k not in _STRIP_FIELDS}
+        context.pending[(event.connection_id, event.request_id)] = {
+            "command": event.command_name,
+            "database": event.database_name,
+            "collection": command.get(event.command_name) if isinstance(command.get(event.command_name), str) else None,
+            "body": command,
+        }
+
+    def succeeded(self, event):
+        context = current_diagnostics.get()
+        if context is None:
+            return
+        operation = context.pending.pop((event.connection_id, event.request_id), None)
+        if operation is None:
+            return
+        operation["duration_ms"] = round(event.duration_micros / 1000, 3)
+        operation["docs_returned"] = _returned(event.command_name, event.reply)
+        context.operations.append(operation)
+
+    def failed(self, event):
+        context = current_diagnostics.get()
+        if context is None:
+            return
+        operation = context.pending.pop((event.connection_id, event.request_id), None)
+        if operation is None:
+            return
+        operation["duration_ms"] = round(event.duration_micros / 1000, 3)
+        operation["error"] = str(event.failure.get("errmsg", event.failure))
+        context.operations.append(operation)
+
+
+def _find_key(node, key):
+    """First value stored under `key` anywhere in an explain document"""
+    if isinstance(node, dict):
+        if key in node:
+            return node[key]
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _leaf_stages(plan, stages: list, indexes: list):
+    if not isinstance(plan, dict):
+        return
+    children = []
+    if "inputStage" in plan:
+        children.append(plan["inputStage"])
+    children.extend(plan.get("inputStages", []))
+    if "queryPlan" in plan:
+        children.append(plan["queryPlan"])
+    if not children and "stage" in plan:
+        stages.append(plan["stage"])
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+    for child in children:
+        _leaf_stages(child, stages, indexes)
+
+
+def summarize_explain(explain: dict) -> dict:
+    winning_plan = _find_key(explain, "winningPlan") or {}
+    stats = _find_key(explain, "executionStats") or {}
+    stages, indexes = [], []
+    _leaf_stages(winning_plan, stages, indexes)
+    return {
+        "plan": "+".join(sorted(set(stages))) or None,
+        "indexes": sorted(set(indexes)),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+    }
+
+
+async def explain_operations(client, context: DiagnosticsContext):
+    # Explains are issued with capture switched off so they are not listed themselves
+    token = current_diagnostics.set(None)
+    try:
+        for operation in context.operations:
+            if operation["command"] not in EXPLAINABLE or "error" in operation:
+                continue
+            try:
+                explain = await client[operation["database"]].command(
+                    {"explain": operation["body"], "verbosity": "executionStats"}
+                )
+                operation.update(summarize_explain(explain))
+            except Exception as e:
+                operation["explain_error"] = str(e)
+    finally:
+        current_diagnostics.reset(token)
+
+
+def build_report(context: DiagnosticsContext) -> dict:
+    operations = []
+    for operation in context.operations:
+        body = operation["body"]
+        summary = {key: value for key, value in operation.items() if key not in ("body", "database")}
+        for field in ("filter", "query", "pipeline", "updates", "deletes"):
+            if field in body:
+                summary[field] = body[field]
+        operations.append(summary)
+    return {
+        "request_ms": round((time.perf_counter() - context.started) * 1000, 3),
+        "total_operations": len(operations),
+        "total_mongo_ms": round(sum(op["duration_ms"] for op in operations), 3),
+        "collscans": sum(1 for op in operations if op.get("plan") and "COLLSCAN" in op["plan"]),
+        "operations": operations,
+    }
+
+
+class DiagnosticsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            name == DIAGNOSTICS_HEADER and value.strip().lower() in ENABLED_VALUES for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        context = DiagnosticsContext()
+        token = current_diagnostics.set(context)
+        start_message = None
+        buffering = False
+        body = []
+        try:
+            async def capture(message):
+                nonlocal start_message, buffering
+                if message["type"] == "http.response.start":
+                    # The user is known by now; anything we will not wrap is streamed through
+                    content_type = dict(message["headers"]).get(b"content-type", b"")
+                    buffering = context.role == "admin" and content_type.startswith(b"application/json")
+                    if buffering:
+                        start_message = message
+                    else:
+                        await send(message)
+                elif buffering:
+                    body.append(message.get("body", b""))
+                else:
+                    await send(message)
+
+            await self.app(scope, receive, capture)
+        finally:
+            current_diagnostics.reset(token)
+
+        if buffering:
+            content = b"".join(body)
+            await explain_operations(scope["app"].state.mongo_client, context)
+            payload = {
+                "response": json.loads(content) if content else None,
+                "diagnostics": build_report(context),
+            }
+            content = json.dumps(payload, default=str).encode("utf-8")
+            start_message = {
+                **start_message,
+                "headers": [(k, v) for k, v in start_message["headers"] if k != b"content-length"]
+                + [(b"content-length", str(len(content)).encode())],
+            }
+            await send(start_message)
+            await send({"type": "http.response.body", "body": content})
@@ -0,0 +1,142 @@
+"""Course-wide exam eligibility as a student x subject matrix.
+
+A course's present counts are loaded from `attendance_stats` into a pandas
+DataFrame (students as rows, subjects as columns). Percentages, eligibility
+and "classes needed" projections are then computed for the whole course in
+one vectorized pass.
+
+The threshold is the course's `attendance_threshold` when set, otherwise
+ATTENDANCE_THRESHOLD from the environment (default 75).
+"""
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def default_threshold() -> float:
+    return float(os.environ.get("ATTENDANCE_THRESHOLD", "75"))
+
+
+def course_threshold(course: Optional[dict]) -> float:
+    value = (course or {}).get("attendance_threshold")
+    return default_threshold() if value is None else float(value)
+
+
+def project_eligibility(present: pd.DataFrame, totals: pd.Series, threshold: float, remaining: int = 0) -> dict:
+    """Percentages, eligibility and classes needed for every student and subject.
+
+    `present` is students x subjects, `totals` the sessions held per subject.
+    `classes_needed` is how many of the next `remaining` sessions a student
+    must attend to be at or above the threshold once they are held;
+    `reachable` is False where even attending all of them is not enough.
+    """
+    attended = present.to_numpy(dtype=float)
+    held = totals.reindex(present.columns, fill_value=0).to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = np.where(held > 0, attended / held * 100, 0.0)
+    eligible = percentage >= threshold
+
+    # Solve (attended + x) / (held + remaining) >= threshold / 100 for x,
+    # rounding first so float noise cannot push an exact answer up by one
+    shortfall = np.round(threshold * (held + remaining) - attended * 100, 6) / 100
+    needed = np.maximum(np.ceil(shortfall), 0)
+    reachable = needed <= remaining
+
+    index, columns = present.index, present.columns
+    return {
+        "percentage": pd.DataFrame(percentage, index=index, columns=columns),
+        "eligible": pd.DataFrame(eligible, index=index, columns=columns),
+        "classes_needed": pd.DataFrame(needed.astype(int), index=index, columns=columns),
+        "reachable": pd.DataFrame(reachable, index=index, columns=columns),
+    }
+
+
+async def load_course_matrix(db, course_id: str):
+    """Students, subjects, present counts (students x subjects) and sessions held per subject"""
+    subjects = await db.subjects.find({"course_id": course_id}, {"_id": 0}).sort("id", 1).to_list(None)
+    students = await db.users.find(
+        {"role": "student", "course_id": course_id},
+        {"_id": 0, "id": 1, "name": 1, "college_id": 1, "email": 1}
+    ).sort("id", 1).to_list(None)
+    subject_ids = [subject["id"] for subject in subjects]
+    student_ids = [student["id"] for student in students]
+
+    totals = {}
+    counts = []
+    async for doc in db.attendance_stats.find({"subject_id": {"$in": subject_ids}}, {"_id": 0}):
+        if doc["student_id"] is None:
+            totals[doc["subject_id"]] = doc.get("total_sessions", 0)
+        else:
+            counts.append((doc["student_id"], doc["subject_id"], doc.get("present", 0)))
+
+    present = pd.DataFrame(counts, columns=["student_id", "subject_id", "present"])
+    present = (
+        present.pivot_table(index="student_id", columns="subject_id", values="present", aggfunc="sum")
+        .reindex(index=student_ids, columns=subject_ids)
+        .fillna(0)
+        .astype(int)
+    )
+    return students, subjects, present, pd.Series(totals, dtype=int).reindex(subject_ids, fill_value=0)
+
+
+async def course_eligibility(db, course: dict, remaining: int = 0) -> dict:
+    threshold = course_threshold(course)
+    students, subjects, present, totals = await load_course_matrix(db, course["id"])
+    result = project_eligibility(present, totals, threshold, remaining)
+
+    attended = present.to_numpy().tolist()
+    percentage = result["percentage"].to_numpy().round(2).tolist()
+    eligible = result["eligible"].to_numpy().tolist()
+    needed = result["classes_needed"].to_numpy().tolist()
+    reachable = result["reachable"].to_numpy().tolist()
+    held = totals.tolist()
+
+    subject_summary = []
+    for j, subject in enumerate(subjects):
+        subject_summary.append({
+            "subject_id": subject["id"],
+            "subject_name": subject["name"],
+            "subject_code": subject["code"],
+            "total_classes": held[j],
+            "eligible_students": int(result["eligible"].iloc[:, j].sum()),
+            "average_percentage": round(float(result["percentage"].iloc[:, j].mean()), 2) if students else 0,
+        })
+
+    student_rows = []
+    for i, student in enumerate(students):
+        cells = []
+        for j, subject in enumerate(subjects):
+            cells.append({
+                "subject_id": subject["id"],
+                "attended": attended[i][j],
+                "percentage": percentage[i][j],
+                "eligible": eligible[i][j],
+                "classes_needed": needed[i][j],
+                "reachable": reachable[i][j],
+            })
+        eligible_count = sum(eligible[i])
+        student_rows.append({
+            "student_id": student["id"],
+            "student_name": student["name"],
+            "college_id": student["college_id"],
+            "eligible_subjects": eligible_count,
+            "overall_eligible": eligible_count == len(subjects) and len(subjects) > 0,
+            "can_recover": all(reachable[i]),
+            "subjects": cells,
+        })
+
+    return {
+        "course": course,
+        "threshold": threshold,
+        "remaining_sessions": remaining,
+        "subjects": subject_summary,
+        "students": student_rows,
+        "summary": {
+            "total_students": len(students),
+            "overall_eligible": sum(1 for row in student_rows if row["overall_eligible"]),
+            "cannot_recover": sum(1 for row in student_rows if not row["can_recover"]),
+        },
+    }
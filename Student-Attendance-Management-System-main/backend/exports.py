@@ -0,0 +1,174 @@
+"""Streaming CSV/XLSX exports of attendance for a subject, course or department.
+
+Rows are produced by async generators over Mongo cursors, so only one chunk
+is held in memory at a time. Lookups are bounded by a single course:
+the roster and the session dates of the subject being exported.
+CSV chunks go straight to the response. XLSX is written chunk by chunk
+through a pandas ExcelWriter into a temporary file, using xlsxwriter's
+constant-memory mode, and that file is then streamed back. A worksheet holds
+at most 1,048,576 rows, so longer exports continue on `attendance_2`,
+`attendance_3` and so on, each with its own header row.
+"""
+import asyncio
+import csv
+import io
+import tempfile
+from typing import AsyncIterator, Dict, List
+
+import pandas as pd
+
+from attendance_stats import get_subject_stats
+from eligibility import course_threshold
+
+CHUNK_ROWS = 1000
+FILE_CHUNK_BYTES = 64 * 1024
+XLSX_SHEET_ROWS = 1048575  # Data rows per worksheet, below the header
+
+REPORT_COLUMNS = [
+    "department_code", "course_code", "subject_code", "subject_name",
+    "college_id", "student_name", "email",
+    "total_classes", "attended", "percentage", "eligible",
+]
+RECORD_COLUMNS = [
+    "department_code", "course_code", "subject_code", "subject_name",
+    "date", "session_id", "college_id", "student_name", "status", "marked_by",
+]
+
+
+async def resolve_subjects(db, scope: str, scope_id: str) -> List[dict]:
+    """Subjects covered by the export, each annotated with its course and department codes"""
+    if scope == "subject":
+        subjects = await db.subjects.find({"id": scope_id}, {"_id": 0}).to_list(None)
+    elif scope == "course":
+        subjects = await db.subjects.find({"course_id": scope_id}, {"_id": 0}).sort("id", 1).to_list(None)
+    else:
+        course_ids = [c["id"] async for c in db.courses.find({"department_id": scope_id}, {"_id": 0, "id": 1})]
+        subjects = await db.subjects.find({"course_id": {"$in": course_ids}}, {"_id": 0}).sort([("course_id", 1), ("id", 1)]).to_list(None)
+
+    course_ids = list({s["course_id"] for s in subjects})
+    courses = {c["id"]: c async for c in db.courses.find({"id": {"$in": course_ids}}, {"_id": 0})}
+    department_ids = list({c["department_id"] for c in courses.values()})
+    departments = {d["id"]: d async for d in db.departments.find({"id": {"$in": department_ids}}, {"_id": 0})}
+
+    for subject in subjects:
+        course = courses.get(subject["course_id"], {})
+        subject["course_code"] = course.get("code")
+        subject["department_code"] = departments.get(course.get("department_id"), {}).get("code")
+        subject["threshold"] = course_threshold(course)
+    return subjects
+
+
+async def _roster(db, course_id: str) -> Dict[str, dict]:
+    return {
+        s["id"]: s
+        async for s in db.users.find(
+            {"role": "student", "course_id": course_id},
+            {"_id": 0, "id": 1, "college_id": 1, "name": 1, "email": 1}
+        )
+    }
+
+
+async def report_rows(db, subjects: List[dict]) -> AsyncIterator[list]:
+    """One row per student and subject, the same figures as the faculty report"""
+    for subject in subjects:
+        total_classes, present_counts = await get_subject_stats(db, subject["id"])
+        async for student in db.users.find(
+            {"role": "student", "course_id": subject["course_id"]},
+            {"_id": 0, "id": 1, "college_id": 1, "name": 1, "email": 1}
+        ).sort("id", 1):
+            attended = present_counts.get(student["id"], 0)
+            percentage = (attended / total_classes * 100) if total_classes > 0 else 0
+            yield [
+                subject["department_code"], subject["course_code"], subject["code"], subject["name"],
+                student["college_id"], student["name"], student["email"],
+                total_classes, attended, round(percentage, 2), percentage >= subject["threshold"],
+            ]
+
+
+async def record_rows(db, subjects: List[dict]) -> AsyncIterator[list]:
+    """One row per raw attendance record"""
+    rosters = {}
+    for subject in subjects:
+        if subject["course_id"] not in rosters:
+            # Subjects are ordered by course, so only the current roster is kept
+            rosters = {subject["course_id"]: await _roster(db, subject["course_id"])}
+        roster = rosters[subject["course_id"]]
+        dates = {
+            s["id"]: s["date"]
+            async for s in db.class_sessions.find({"subject_id": subject["id"]}, {"_id": 0, "id": 1, "date": 1})
+        }
+        async for record in db.attendance_records.find(
+            {"subject_id": subject["id"]},
+            {"_id": 0, "session_id": 1, "student_id": 1, "status": 1, "marked_by": 1}
+        ).sort("id", 1):
+            student = roster.get(record["student_id"], {})
+            yield [
+                subject["department_code"], subject["course_code"], subject["code"], subject["name"],
+                dates.get(record["session_id"]), record["session_id"],
+                student.get("college_id", record["student_id"]), student.get("name"),
+                record["status"], record["marked_by"],
+            ]
+
+
+async def _chunks(rows: AsyncIterator[list]) -> AsyncIterator[List[list]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def stream_csv(columns: List[str], rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _add_xlsx_sheet(book, columns: List[str], number: int):
+    sheet = book.add_worksheet("attendance" if number == 1 else f"attendance_{number}")
+    sheet.write_row(0, 0, columns)
+    return sheet
+
+
+def _write_xlsx_rows(sheet, start_row: int, rows: List[list]):
+    for offset, row in enumerate(rows):
+        sheet.write_row(start_row + offset, 0, row)
+
+
+async def stream_xlsx(columns: List[str], rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    with tempfile.TemporaryFile() as tmp:
+        # DataFrame.to_excel writes column by column, which constant-memory
+        # mode cannot accept, so rows go through the engine's worksheet directly
+        writer = pd.ExcelWriter(tmp, engine="xlsxwriter", engine_kwargs={"options": {"constant_memory": True}})
+        sheets = 1
+        sheet = _add_xlsx_sheet(writer.book, columns, sheets)
+        next_row = 1
+        async for chunk in _chunks(rows):
+            while chunk:
+                if next_row > XLSX_SHEET_ROWS:
+                    # xlsxwriter silently drops rows past the sheet limit
+                    sheets += 1
+                    sheet = _add_xlsx_sheet(writer.book, columns, sheets)
+                    next_row = 1
+                part = chunk[:XLSX_SHEET_ROWS + 1 - next_row]
+                chunk = chunk[len(part):]
+                await asyncio.to_thread(_write_xlsx_rows, sheet, next_row, part)
+                next_row += len(part)
+        await asyncio.to_thread(writer.close)
+
+        tmp.seek(0)
+        while True:
+            data = await asyncio.to_thread(tmp.read, FILE_CHUNK_BYTES)
+            if not data:
+                break
+            yield data
@@ -0,0 +1,33 @@
+"""JSON responses rendered with orjson.
+
+By default FastAPI passes every returned value through `jsonable_encoder`,
+and through the `response_model` again when one is declared, and then
+renders it with `json.dumps`. Handlers on hot paths return a FastJSONResponse
+instead, which FastAPI sends as is. Mongo documents (projected without
+`_id`) and report dicts are then serialized by orjson in a single pass.
+Routes with a `response_model` keep it for the OpenAPI schema and return
+`model_response(obj)` for a model they have just built and validated.
+
+FastJSONResponse is also the app's default response class, so other routes
+still get the faster rendering after the usual encoding.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=str, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> FastJSONResponse:
+    return FastJSONResponse(model.model_dump(), status_code=status_code)
@@ -0,0 +1,157 @@
+import logging
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes every collection needs, keyed by collection name
+REQUIRED_INDEXES: Dict[str, List[dict]] = {
+    "users": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("college_id", ASCENDING)], "unique": True},
+        {"keys": [("role", ASCENDING), ("course_id", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "departments": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+    ],
+    "courses": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("department_id", ASCENDING)]},
+    ],
+    "subjects": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("course_id", ASCENDING)]},
+        {"keys": [("faculty_id", ASCENDING)]},
+    ],
+    "class_sessions": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("subject_id", ASCENDING), ("date", ASCENDING)]},
+        {"keys": [("faculty_id", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "attendance_records": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("session_id", ASCENDING), ("student_id", ASCENDING)], "unique": True},
+        {"keys": [("subject_id", ASCENDING), ("student_id", ASCENDING), ("status", ASCENDING)]},
+        {"keys": [("student_id", ASCENDING), ("subject_id", ASCENDING)]},
+        {"keys": [("subject_id", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "attendance_stats": [
+        {"keys": [("subject_id", ASCENDING), ("student_id", ASCENDING)], "unique": True},
+        {"keys": [("student_id", ASCENDING), ("subject_id", ASCENDING)]},
+    ],
+    "attendance_daily": [
+        {"keys": [("subject_id", ASCENDING), ("day", ASCENDING)], "unique": True},
+        {"keys": [("course_id", ASCENDING), ("day", ASCENDING)]},
+        {"keys": [("department_id", ASCENDING), ("day", ASCENDING)]},
+    ],
+    "student_attendance_daily": [
+        {"keys": [("student_id", ASCENDING), ("day", ASCENDING)], "unique": True},
+    ],
+    "archived_terms": [
+        {"keys": [("term", ASCENDING)], "unique": True},
+    ],
+    "attendance_term_stats": [
+        {"keys": [("term", ASCENDING), ("subject_id", ASCENDING), ("student_id", ASCENDING)], "unique": True},
+        {"keys": [("student_id", ASCENDING), ("term", ASCENDING)]},
+    ],
+    "alert_runs": [
+        {"keys": [("run_id", ASCENDING)], "unique": True},
+        {"keys": [("expires_at", ASCENDING)], "expire_after_seconds": 0},
+    ],
+}
+
+# Queries issued on hot paths, with the fields whose values are sampled from
+# an existing document so the explain runs against realistic data
+HOT_QUERIES = [
+    {"name": "get_current_user", "collection": "users", "fields": ["id"]},
+    {"name": "login", "collection": "users", "fields": ["college_id"]},
+    {"name": "course_roster", "collection": "users", "fields": ["role", "course_id"]},
+    {"name": "subject_sessions", "collection": "class_sessions", "fields": ["subject_id"]},
+    {"name": "faculty_sessions", "collection": "class_sessions", "fields": ["faculty_id"]},
+    {"name": "duplicate_mark_check", "collection": "attendance_records", "fields": ["session_id", "student_id"]},
+    {"name": "subject_attendance", "collection": "attendance_records", "fields": ["subject_id"]},
+    {"name": "student_attendance", "collection": "attendance_records", "fields": ["student_id", "subject_id", "status"]},
+]
+
+
+def index_name(keys) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+async def ensure_indexes(db, required: Optional[Dict[str, List[dict]]] = None) -> List[str]:
+    """Create any required index that does not exist yet, returning the names created"""
+    created = []
+    for collection, specs in (required or REQUIRED_INDEXES).items():
+        existing = await db[collection].index_information()
+        for spec in specs:
+            name = index_name(spec["keys"])
+            if name in existing:
+                continue
+            try:
+                options = {"expireAfterSeconds": spec["expire_after_seconds"]} if "expire_after_seconds" in spec else {}
+                await db[collection].create_index(spec["keys"], name=name, unique=spec.get("unique", False), **options)
+                created.append(f"{collection}.{name}")
+            except OperationFailure as e:
+                # Typically duplicate data blocking a unique index; keep serving
+                logger.error(f"Failed to create index {collection}.{name}: {e}")
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def _winning_stage(plan: dict) -> str:
+    # Walk down to the leaf stage, which is COLLSCAN or IXSCAN
+    while "inputStage" in plan:
+        plan = plan["inputStage"]
+    return plan.get("stage", "UNKNOWN")
+
+
+async def explain_hot_query(db, query: dict) -> dict:
+    collection = db[query["collection"]]
+    sample = await collection.find_one(
+        {field: {"$exists": True} for field in query["fields"]},
+        {"_id": 0, **{field: 1 for field in query["fields"]}}
+    )
+    if not sample:
+        return {"name": query["name"], "collection": query["collection"], "skipped": "no sample document"}
+
+    explain = await collection.find({field: sample.get(field) for field in query["fields"]}).explain()
+    stats = explain.get("executionStats", {})
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        "stage": _winning_stage(explain.get("queryPlanner", {}).get("winningPlan", {})),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+    }
+
+
+async def index_health(db) -> dict:
+    """Report missing and unused indexes and how many documents each hot query scans"""
+    missing = []
+    unused = []
+    for collection, specs in REQUIRED_INDEXES.items():
+        existing = await db[collection].index_information()
+        for spec in specs:
+            name = index_name(spec["keys"])
+            if name not in existing:
+                missing.append({"collection": collection, "index": name})
+
+        async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+            if stats["name"] != "_id_" and stats.get("accesses", {}).get("ops", 0) == 0:
+                unused.append({
+                    "collection": collection,
+                    "index": stats["name"],
+                    "since": stats.get("accesses", {}).get("since"),
+                })
+
+    hot_queries = [await explain_hot_query(db, query) for query in HOT_QUERIES]
+
+    return {
+        "missing": missing,
+        "unused": unused,
+        "hot_queries": hot_queries,
+    }
@@ -0,0 +1,159 @@
+"""Live attendance events for a subject, delivered over Server-Sent Events.
+
+EventBroker fans events out in-process to one bounded queue per connected
+client. By default the write handlers publish after their writes commit.
+With LIVE_CHANGE_STREAMS=true the broker is fed by a Mongo change stream on
+`class_sessions` and `attendance_records` instead, which needs a replica set.
+The handlers then publish nothing, and every worker process sees writes made
+by the others.
+
+Event types and payloads:
+    session.created     {"session": {...}}
+    attendance.marked   {"records": [{"id", "session_id", "student_id", "status"}, ...]}
+    attendance.updated  {"id", "session_id", "student_id", "old_status", "status"}
+
+`old_status` is null for updates read from a change stream.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+RECORD_FIELDS = ("id", "session_id", "student_id", "status")
+
+
+def format_event(event_id: int, event_type: str, data: dict) -> bytes:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+class EventBroker:
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.change_streams = False
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._next_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, subject_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[subject_id].add(queue)
+        return queue
+
+    def unsubscribe(self, subject_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(subject_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[subject_id]
+
+    def publish(self, subject_id: str, event_type: str, data: dict):
+        subscribers = self._subscribers.get(subject_id)
+        if not subscribers:
+            return
+        self._next_id += 1
+        self.published += 1
+        message = format_event(self._next_id, event_type, data)
+        for queue in list(subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind reloads its report instead, so its
+                # backlog is discarded to make room for the resync marker
+                self.dropped += 1
+                self.unsubscribe(subject_id, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def emit(self, subject_id: str, event_type: str, data: dict):
+        """Publish from a request handler unless the change stream already delivers this write"""
+        if not self.change_streams:
+            self.publish(subject_id, event_type, data)
+
+    async def stream(self, subject_id: str, is_disconnected: Callable) -> AsyncIterator[bytes]:
+        queue = self.subscribe(subject_id)
+        try:
+            yield b"retry: 3000\nevent: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield b"event: resync\ndata: {}\n\n"
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subject_id, queue)
+
+    def stats(self) -> dict:
+        return {
+            "source": "change_streams" if self.change_streams else "handlers",
+            "subjects": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class ChangeStreamFeed:
+    """Publishes inserts and status changes from a change stream to the broker"""
+
+    def __init__(self, db, broker: EventBroker):
+        self.db = db
+        self.broker = broker
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.broker.change_streams = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": ["class_sessions", "attendance_records"]},
+            "operationType": {"$in": ["insert", "update"]},
+        }}]
+        while True:
+            try:
+                async with self.db.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        self._dispatch(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Change stream failed, retrying: {e}")
+                await asyncio.sleep(5)
+
+    def _dispatch(self, change: dict):
+        doc = change.get("fullDocument")
+        if not doc:
+            return
+        doc.pop("_id", None)
+        if change["ns"]["coll"] == "class_sessions":
+            if change["operationType"] == "insert":
+                self.broker.publish(doc["subject_id"], "session.created", {"session": doc})
+            return
+
+        record = {field: doc.get(field) for field in RECORD_FIELDS}
+        if change["operationType"] == "insert":
+            self.broker.publish(doc["subject_id"], "attendance.marked", {"records": [record]})
+        elif "status" in change.get("updateDescription", {}).get("updatedFields", {}):
+            # Change events carry no pre-image, so clients reload on a null old_status
+            self.broker.publish(doc["subject_id"], "attendance.updated", {**record, "old_status": None})
@@ -0,0 +1,132 @@
+"""Admission control for `POST /api/auth/login`.
+
+Every login costs a bcrypt verification, so a burst of them can take every
+core from the rest of the API. Before a login touches Mongo or bcrypt it must
+take a token from two buckets, one for the client IP and one for the
+college_id. It then needs one of `max_verifications` slots for the bcrypt
+check itself. Over budget, the login is refused at once with 429 and a
+`Retry-After` hint instead of being queued.
+
+Buckets live in an AdmissionBackend. MemoryBackend keeps them per process.
+A shared store (e.g. Redis with a small Lua script) can implement `take` so
+that all workers draw from the same buckets. Verification slots always stay
+per process because they protect this process's CPU.
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(math.ceil(retry_after), 1)
+
+
+class AdmissionBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from `key`'s bucket.
+
+        Returns 0 when a token was taken, otherwise the seconds until one is
+        available. Buckets refill at `rate` tokens per second up to `burst`.
+        """
+
+
+class MemoryBackend(AdmissionBackend):
+    """Token buckets in a bounded LRU; the least recently used keys are dropped first"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate if rate > 0 else 60.0
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoginAdmission:
+    def __init__(self, backend: Optional[AdmissionBackend] = None,
+                 ip_per_minute: float = 300, ip_burst: int = 100,
+                 id_per_minute: float = 5, id_burst: int = 10,
+                 max_verifications: int = 16):
+        self.backend = backend or MemoryBackend()
+        self.ip_rate = ip_per_minute / 60
+        self.ip_burst = ip_burst
+        self.id_rate = id_per_minute / 60
+        self.id_burst = id_burst
+        self.max_verifications = max_verifications
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.admitted = 0
+        self.rejected = {"ip": 0, "college_id": 0, "busy": 0}
+
+    async def admit(self, college_id: str, ip: str):
+        """Raise AdmissionRejected unless both the IP and the college_id have budget left"""
+        wait = await self.backend.take(f"login:ip:{ip}", self.ip_rate, self.ip_burst)
+        if wait:
+            self.rejected["ip"] += 1
+            raise AdmissionRejected("ip", wait)
+        wait = await self.backend.take(f"login:id:{college_id.lower()}", self.id_rate, self.id_burst)
+        if wait:
+            self.rejected["college_id"] += 1
+            raise AdmissionRejected("college_id", wait)
+        self.admitted += 1
+
+    @contextmanager
+    def verification(self):
+        """Hold one of the bcrypt verification slots, or raise AdmissionRejected if all are taken"""
+        if self.in_flight >= self.max_verifications:
+            self.rejected["busy"] += 1
+            raise AdmissionRejected("busy", 1)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "ip_per_minute": self.ip_rate * 60,
+            "ip_burst": self.ip_burst,
+            "college_id_per_minute": self.id_rate * 60,
+            "college_id_burst": self.id_burst,
+            "max_verifications": self.max_verifications,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+def client_ip(scope_client, forwarded_for: Optional[str], trusted_hops: int = 0) -> str:
+    """The address `trusted_hops` proxies saw the request come from.
+
+    Each proxy appends the address it received the request from, so only the
+    rightmost `trusted_hops` entries of X-Forwarded-For can be trusted; the
+    client can put anything to the left of them.
+    """
+    entries = [entry.strip() for entry in (forwarded_for or "").split(",") if entry.strip()]
+    if trusted_hops > 0 and entries:
+        return entries[-min(trusted_hops, len(entries))]
+    return scope_client.host if scope_client else "unknown"
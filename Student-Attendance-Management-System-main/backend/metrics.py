@@ -0,0 +1,200 @@
+"""Per-route request metrics and Mongo command timing in Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it with the matched
+route template, e.g. `/api/faculty/reports/{subject_id}`. MongoCommandListener
+is registered on the Motor client. It attributes each command to the request
+that issued it through a context variable, which Motor copies into its
+executor threads, so Mongo counts and durations can be broken down per route.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMAND_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class RequestContext:
+    """Mongo activity of one in-flight request"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.commands = 0
+        self.command_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+current_request: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar("current_request", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.commands_per_request = defaultdict(lambda: Histogram(COMMAND_COUNT_BUCKETS))
+        self.in_flight = defaultdict(int)
+        self.mongo_commands = defaultdict(int)
+        self.mongo_seconds = defaultdict(float)
+        self.mongo_failures = defaultdict(int)
+
+    def request_started(self, method: str):
+        with self._lock:
+            self.in_flight[method] += 1
+
+    def request_finished(self, method: str, context: RequestContext, status: int, seconds: float):
+        route = context.route
+        with self._lock:
+            self.in_flight[method] -= 1
+            self.requests[(method, route, status)] += 1
+            self.latency[(method, route)].observe(seconds)
+            self.commands_per_request[(method, route)].observe(context.commands)
+
+    def command_finished(self, command: str, seconds: float, failed: bool):
+        context = current_request.get()
+        route = context.route if context else "background"
+        with self._lock:
+            self.mongo_commands[(route, command)] += 1
+            self.mongo_seconds[(route, command)] += seconds
+            if failed:
+                self.mongo_failures[(route, command)] += 1
+            if context:
+                context.commands += 1
+                context.command_seconds += seconds
+
+    def _histogram_lines(self, name: str, histograms: dict, label_names) -> list:
+        lines = []
+        for key, hist in sorted(histograms.items()):
+            labels = dict(zip(label_names, key))
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+            lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+            lines.append(f"{name}_sum{_labels(**labels)} {hist.sum}")
+            lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total HTTP requests by route and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds HTTP request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            lines += self._histogram_lines("http_request_duration_seconds", self.latency, ("method", "route"))
+
+            lines += [
+                "# HELP http_requests_in_flight HTTP requests currently being served.",
+                "# TYPE http_requests_in_flight gauge",
+            ]
+            for method, count in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{_labels(method=method)} {count}")
+
+            lines += [
+                "# HELP mongo_commands_per_request Mongo commands issued by a single request.",
+                "# TYPE mongo_commands_per_request histogram",
+            ]
+            lines += self._histogram_lines("mongo_commands_per_request", self.commands_per_request, ("method", "route"))
+
+            lines += [
+                "# HELP mongo_commands_total Mongo commands by originating route and command name.",
+                "# TYPE mongo_commands_total counter",
+            ]
+            for (route, command), count in sorted(self.mongo_commands.items()):
+                lines.append(f"mongo_commands_total{_labels(route=route, command=command)} {count}")
+
+            lines += [
+                "# HELP mongo_command_duration_seconds_total Time spent in Mongo commands by route and command name.",
+                "# TYPE mongo_command_duration_seconds_total counter",
+            ]
+            for (route, command), seconds in sorted(self.mongo_seconds.items()):
+                lines.append(f"mongo_command_duration_seconds_total{_labels(route=route, command=command)} {seconds}")
+
+            lines += [
+                "# HELP mongo_command_failures_total Failed Mongo commands by route and command name.",
+                "# TYPE mongo_command_failures_total counter",
+            ]
+            for (route, command), count in sorted(self.mongo_failures.items()):
+                lines.append(f"mongo_command_failures_total{_labels(route=route, command=command)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.registry.command_finished(event.command_name, event.duration_micros / 1e6, failed=False)
+
+    def failed(self, event):
+        self.registry.command_finished(event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        context = RequestContext(scope)
+        token = current_request.set(context)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.request_started(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.registry.request_finished(method, context, status, time.perf_counter() - started)
+            current_request.reset(token)
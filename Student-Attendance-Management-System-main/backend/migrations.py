@@ -0,0 +1,66 @@
+"""One-time data migrations run from worker startup.
+
+Every worker warms up at the same time, so a migration is guarded by a lock
+document in `migrations`, keyed by the migration's name. The worker that
+takes the lock runs it and marks it `done`. The others report "not yet" and
+their warmup retries until it is done, so no worker serves requests from
+half-built data. A lock whose worker died is taken over after
+MIGRATION_LEASE_SECONDS.
+"""
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = str(uuid.uuid4())
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def run_once(db, name: str, needed: Callable[[], Awaitable[bool]], migrate: Callable[[], Awaitable]) -> bool:
+    """Run `migrate` once across all workers if `needed` says so.
+
+    Returns True once the data is in place, and False while another worker
+    holds the lock.
+    """
+    now = _now().isoformat()
+    doc = await db.migrations.find_one({"_id": name})
+    if doc and doc["status"] == "done":
+        return True
+    if doc and doc["locked_until"] > now:
+        return False
+    if not await needed():
+        return True
+
+    lease = float(os.environ.get("MIGRATION_LEASE_SECONDS", "900"))
+    try:
+        # Matches a missing lock (inserted by the upsert) or an expired one
+        await db.migrations.update_one(
+            {"_id": name, "status": "running", "locked_until": {"$lte": now}},
+            {"$set": {"owner": WORKER_ID, "started_at": now,
+                      "locked_until": (_now() + timedelta(seconds=lease)).isoformat()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+
+    logger.info(f"Running migration {name}")
+    try:
+        await migrate()
+    except BaseException:
+        # Let the next attempt, from this worker or another, start over
+        await db.migrations.update_one({"_id": name, "owner": WORKER_ID}, {"$set": {"locked_until": now}})
+        raise
+    await db.migrations.update_one(
+        {"_id": name, "owner": WORKER_ID},
+        {"$set": {"status": "done", "finished_at": _now().isoformat()}}
+    )
+    logger.info(f"Migration {name} done")
+    return True
@@ -0,0 +1,127 @@
+"""College-wide admin overview with per-department and per-course breakdowns.
+
+Every query runs concurrently: user counts come from one `$facet`
+aggregation, session totals from the `attendance_stats` subject counters
+and at-risk students from one aggregation over the per-student counters.
+The server caches the result for OVERVIEW_CACHE_TTL seconds.
+
+A student is at risk when their present count is below the threshold in any
+subject that has held at least one session. Students with no marks at all in
+such a subject have no counter and are not counted.
+"""
+import asyncio
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from eligibility import course_threshold
+
+
+def required_present(threshold: float, total_sessions: int) -> int:
+    """Fewest present marks that reach the threshold over `total_sessions`"""
+    return max(math.ceil(round(threshold * total_sessions, 6) / 100), 0)
+
+
+async def _user_counts(db) -> dict:
+    result = await db.users.aggregate([
+        {"$match": {"role": {"$in": ["student", "faculty"]}}},
+        {"$facet": {
+            "roles": [{"$group": {"_id": "$role", "count": {"$sum": 1}}}],
+            "students_by_course": [
+                {"$match": {"role": "student"}},
+                {"$group": {"_id": "$course_id", "count": {"$sum": 1}}}
+            ],
+        }}
+    ]).to_list(None)
+    facets = result[0] if result else {"roles": [], "students_by_course": []}
+    return {
+        "roles": {row["_id"]: row["count"] for row in facets["roles"]},
+        "students_by_course": {row["_id"]: row["count"] for row in facets["students_by_course"]},
+    }
+
+
+async def _subject_totals(db) -> dict:
+    return {
+        doc["subject_id"]: doc.get("total_sessions", 0)
+        async for doc in db.attendance_stats.find({"student_id": None}, {"_id": 0, "subject_id": 1, "total_sessions": 1})
+    }
+
+
+async def _at_risk_by_course(db, subjects: list, courses: dict, totals: dict) -> dict:
+    branches = []
+    for subject in subjects:
+        total = totals.get(subject["id"], 0)
+        if total == 0:
+            continue
+        required = required_present(course_threshold(courses.get(subject["course_id"])), total)
+        branches.append({
+            "subject_id": subject["id"],
+            "$expr": {"$lt": [{"$ifNull": ["$present", 0]}, required]},
+        })
+    if not branches:
+        return {}
+
+    course_of = {subject["id"]: subject["course_id"] for subject in subjects}
+    at_risk = defaultdict(int)
+    # A student's subjects all belong to their course, so any one identifies it
+    async for row in db.attendance_stats.aggregate([
+        {"$match": {"student_id": {"$ne": None}, "$or": branches}},
+        {"$group": {"_id": "$student_id", "subject_id": {"$first": "$subject_id"}}},
+        {"$group": {"_id": "$subject_id", "count": {"$sum": 1}}},
+    ], allowDiskUse=True):
+        at_risk[course_of.get(row["_id"])] += row["count"]
+    return at_risk
+
+
+async def build_overview(db) -> dict:
+    departments, courses, subjects, users, totals = await asyncio.gather(
+        db.departments.find({}, {"_id": 0}).sort("id", 1).to_list(None),
+        db.courses.find({}, {"_id": 0}).sort("id", 1).to_list(None),
+        db.subjects.find({}, {"_id": 0, "id": 1, "course_id": 1}).to_list(None),
+        _user_counts(db),
+        _subject_totals(db),
+    )
+    courses_by_id = {course["id"]: course for course in courses}
+    at_risk = await _at_risk_by_course(db, subjects, courses_by_id, totals)
+
+    subject_counts = defaultdict(int)
+    session_counts = defaultdict(int)
+    for subject in subjects:
+        subject_counts[subject["course_id"]] += 1
+        session_counts[subject["course_id"]] += totals.get(subject["id"], 0)
+
+    course_rows = defaultdict(list)
+    for course in courses:
+        course_rows[course.get("department_id")].append({
+            "course_id": course["id"],
+            "name": course["name"],
+            "code": course["code"],
+            "threshold": course_threshold(course),
+            "students": users["students_by_course"].get(course["id"], 0),
+            "subjects": subject_counts[course["id"]],
+            "sessions": session_counts[course["id"]],
+            "at_risk_students": at_risk.get(course["id"], 0),
+        })
+
+    department_rows = []
+    for department in departments:
+        rows = course_rows.get(department["id"], [])
+        department_rows.append({
+            "department_id": department["id"],
+            "name": department["name"],
+            "code": department["code"],
+            **{field: sum(row[field] for row in rows) for field in ("students", "subjects", "sessions", "at_risk_students")},
+            "courses": rows,
+        })
+
+    return {
+        "total_students": users["roles"].get("student", 0),
+        "total_faculty": users["roles"].get("faculty", 0),
+        "total_subjects": len(subjects),
+        "total_sessions": sum(totals.values()),
+        "total_departments": len(departments),
+        "total_courses": len(courses),
+        "at_risk_students": sum(at_risk.values()),
+        "departments": department_rows,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1,65 @@
+import json
+from typing import Optional
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pymongo import ASCENDING
+
+from fast_json import FastJSONResponse
+
+MAX_PAGE_SIZE = 1000
+NEXT_PAGE_HEADER = "X-Next-After"
+NDJSON_BATCH_SIZE = 500
+
+
+class PageParams:
+    """Keyset pagination over the unique `id` field.
+
+    `limit` caps the page size (the route's default, MAX_PAGE_SIZE unless it
+    says otherwise, when omitted) and `after`
+    resumes after the last `id` seen. The id to pass as the next `after` is
+    returned in the X-Next-After header. `format=ndjson` streams documents
+    straight from the cursor, one JSON object per line, so memory stays flat
+    regardless of collection size; without a `limit` it streams everything.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+    ):
+        self.limit = limit
+        self.after = after
+        self.format = format
+
+
+async def _ndjson_lines(cursor):
+    batch = []
+    async for doc in cursor:
+        batch.append(json.dumps(doc, default=str))
+        if len(batch) >= NDJSON_BATCH_SIZE:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+async def list_documents(collection, query: dict, projection: dict, page: PageParams, default_limit: int = MAX_PAGE_SIZE):
+    if page.after is not None:
+        query = {**query, "id": {"$gt": page.after}}
+    cursor = collection.find(query, projection).sort("id", ASCENDING)
+
+    if page.format == "ndjson":
+        if page.limit is not None:
+            cursor = cursor.limit(page.limit)
+        return StreamingResponse(_ndjson_lines(cursor), media_type="application/x-ndjson")
+
+    # Fetch one extra document to know whether another page exists
+    limit = page.limit or default_limit
+    docs = await cursor.limit(limit + 1).to_list(None)
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers[NEXT_PAGE_HEADER] = docs[-1]["id"]
+    return FastJSONResponse(docs, headers=headers)
@@ -0,0 +1,108 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+from passlib.context import CryptContext
+
+_worker_contexts = {}
+
+
+def _hash_chunk(config: str, passwords: List[str]) -> List[str]:
+    # Runs in a pool process; the context is rebuilt once per process
+    if config not in _worker_contexts:
+        _worker_contexts[config] = CryptContext.from_string(config)
+    context = _worker_contexts[config]
+    return [context.hash(password) for password in passwords]
+
+
+class PasswordPool:
+    """Runs bcrypt hashing and verification on a dedicated thread pool.
+
+    bcrypt releases the GIL while it works, so a small thread pool keeps the
+    event loop free and still uses several cores. `concurrency` bounds how
+    many operations run at once; callers beyond that wait in line and are
+    counted in `queue_depth`.
+
+    Bulk imports go through `hash_many` instead, which spreads a batch over a
+    separate process pool with one worker per core. Logins keep their own
+    threads and are not stuck behind thousands of import hashes.
+    """
+
+    def __init__(self, pwd_context: CryptContext, concurrency: int = 4, processes: Optional[int] = None):
+        self.pwd_context = pwd_context
+        self.concurrency = concurrency
+        self.processes = processes or os.cpu_count() or 2
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bcrypt")
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self._config = pwd_context.to_string()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.bulk_hashed = 0
+
+    async def _run(self, func, *args):
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        if not passwords:
+            return []
+        if self._process_executor is None:
+            # Spawned rather than forked: the server process has live threads and sockets
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        size = -(-len(passwords) // self.processes)
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(self._process_executor, _hash_chunk, self._config, passwords[i:i + size])
+            for i in range(0, len(passwords), size)
+        ))
+        self.bulk_hashed += len(passwords)
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "processes": self.processes,
+            "bulk_hashed": self.bulk_hashed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def default_concurrency() -> int:
+    return int(os.environ.get("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 2)))
+
+
+def default_processes() -> int:
+    return int(os.environ.get("PASSWORD_IMPORT_PROCESSES", str(os.cpu_count() or 2)))
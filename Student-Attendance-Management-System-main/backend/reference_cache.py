@@ -0,0 +1,85 @@
+import hashlib
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+
+from fast_json import dumps
+
+
+class ReferenceCache:
+    """Serialized copies of rarely-changing reference collections.
+
+    Each collection has a version counter that write paths bump; an entry is
+    served while its version matches and it is younger than `ttl`. With a
+    `store` (a callable returning a Mongo collection) the counters are
+    documents there, bumped with `$inc` and read with one `find_one` per
+    request, so a write through any worker invalidates every worker's copy.
+    Without one they are kept in this process and only the TTL bounds
+    staleness elsewhere. The ETag is a hash of the serialized body, so every
+    worker hands out the same tag for the same data.
+    """
+
+    def __init__(self, ttl: float = 300.0, store: Optional[Callable[[], Any]] = None):
+        self.ttl = ttl
+        self.store = store
+        self.versions = defaultdict(int)
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def bump(self, name: str):
+        if self.store is None:
+            self.versions[name] += 1
+            return
+        await self.store().update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def _version(self, name: str) -> int:
+        if self.store is not None:
+            doc = await self.store().find_one({"_id": name}, {"version": 1})
+            self.versions[name] = doc["version"] if doc else 0
+        return self.versions[name]
+
+    async def get(self, name: str, loader: Callable[[], Awaitable[Any]]) -> tuple:
+        version = await self._version(name)
+        entry = self._entries.get(name)
+        if entry and entry[0] == version and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[2], entry[3]
+
+        self.misses += 1
+        data = await loader()
+        body = dumps(data)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        # Only store if nothing was bumped while loading
+        if await self._version(name) == version:
+            self._entries[name] = (version, time.monotonic() + self.ttl, body, etag)
+        return body, etag
+
+    async def respond(self, name: str, request: Request, loader: Callable[[], Awaitable[Any]]) -> Response:
+        body, etag = await self.get(name, loader)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "versions": dict(self.versions),
+            "cached": sorted(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in header.split(","))
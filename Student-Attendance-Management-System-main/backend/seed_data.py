@@ -1,47 +1,143 @@
+"""Seed the database with the BCA demo class or a large synthetic college.
+
+    python seed_data.py                      # BCA Year 3 demo class
+    python seed_data.py --synthetic --departments 10 --courses 5 \\
+        --subjects 6 --students 1000 --days 120 --seed 42
+
+In synthetic mode `--courses`, `--subjects` and `--students` are per
+department, per course and per course respectively, so the example above
+creates 50k students. All documents go through batched unordered
+`insert_many` calls spread over concurrent writers. Each distinct password is
+hashed once, and the same `--seed` always produces the same data.
+"""
+import argparse
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
-from passlib.context import CryptContext
 import os
-from datetime import datetime, timedelta, timezone
 import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from passlib.context import CryptContext
+
+from attendance_trends import rebuild_trends
+from indexes import ensure_indexes
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-async def seed_database():
-    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-    client = AsyncIOMotorClient(mongo_url)
-    db = client["attendance_system"]
-    
-    # Clear existing data
-    await db.users.delete_many({})
-    await db.departments.delete_many({})
-    await db.courses.delete_many({})
-    await db.subjects.delete_many({})
-    await db.class_sessions.delete_many({})
-    await db.attendance_records.delete_many({})
-    
+COLLECTIONS = ["users", "departments", "courses", "subjects", "class_sessions", "attendance_records", "attendance_stats",
+               "attendance_daily", "student_attendance_daily", "archived_terms", "attendance_term_stats"]
+
+FIRST_NAMES = ["AARAV", "ABINAYA", "ANBU", "ATCHAYA", "BALA", "DEEPA", "DHANUSH", "DIVYA", "GOKUL", "HARINI",
+               "KAVIN", "KAVYA", "KISHORE", "LAKSHMI", "MADHU", "MANOJ", "NIVETHA", "PRAVEEN", "PRIYA", "RAHUL",
+               "SANJAY", "SNEHA", "SURYA", "SWATHI", "THARUN", "VARSHA", "VIGNESH", "YAZHINI"]
+INITIALS = "ABCDEGHJKMNPRSTV"
+
+
+class Seeder:
+    """Buffers documents per collection and writes them in batches from concurrent writers"""
+
+    def __init__(self, db, batch_size: int = 5000, writers: int = 4):
+        self.db = db
+        self.batch_size = batch_size
+        self.writers = writers
+        self.buffers = {}
+        self.inserted = {}
+        self.hashes = {}
+        self.errors = []
+        self.queue = asyncio.Queue(maxsize=writers * 2)
+        self.tasks = []
+
+    def password_hash(self, password: str) -> str:
+        if password not in self.hashes:
+            self.hashes[password] = pwd_context.hash(password)
+        return self.hashes[password]
+
+    async def start(self):
+        self.tasks = [asyncio.create_task(self._writer()) for _ in range(self.writers)]
+
+    async def _writer(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                collection, docs = item
+                try:
+                    await self.db[collection].insert_many(docs, ordered=False)
+                    self.inserted[collection] = self.inserted.get(collection, 0) + len(docs)
+                except Exception as e:
+                    # Keep draining the queue so producers never block on a dead writer
+                    self.errors.append(f"{collection}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def add(self, collection: str, doc: dict):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            self.buffers[collection] = []
+            await self.queue.put((collection, buffer))
+
+    async def close(self):
+        for collection, buffer in self.buffers.items():
+            if buffer:
+                await self.queue.put((collection, buffer))
+        self.buffers = {}
+        for _ in self.tasks:
+            await self.queue.put(None)
+        await asyncio.gather(*self.tasks)
+        if self.errors:
+            raise RuntimeError(f"{len(self.errors)} batches failed, first: {self.errors[0]}")
+
+
+async def add_sessions(seeder: Seeder, rng: random.Random, subject: dict, students: list, dates: list, propensity: dict, created_at: str):
+    """Sessions and attendance for one subject, with the matching attendance_stats counters"""
+    counts = {student["id"]: {"present": 0, "absent": 0} for student in students}
+    for day, session_date in enumerate(dates):
+        s_id = f"sess-{subject['code']}-{day}"
+        await seeder.add("class_sessions", {
+            "id": s_id, "subject_id": subject["id"], "faculty_id": subject["faculty_id"],
+            "date": session_date, "created_at": created_at
+        })
+        for stu in students:
+            status = "present" if rng.random() < propensity.get(stu["id"], 0.85) else "absent"
+            counts[stu["id"]][status] += 1
+            await seeder.add("attendance_records", {
+                "id": f"att-{s_id}-{stu['college_id']}", "session_id": s_id,
+                "student_id": stu["id"], "subject_id": subject["id"], "status": status,
+                "marked_by": subject["faculty_id"], "created_at": created_at
+            })
+
+    await seeder.add("attendance_stats", {"subject_id": subject["id"], "student_id": None, "total_sessions": len(dates)})
+    for student_id, counters in counts.items():
+        await seeder.add("attendance_stats", {"subject_id": subject["id"], "student_id": student_id, **counters})
+
+
+async def seed_demo(seeder: Seeder, rng: random.Random, created_at: str):
     print("Creating admin user...")
-    admin = {
+    await seeder.add("users", {
         "id": "admin-001",
         "college_id": "brubk2025",
         "name": "Leowillfride A",
         "email": "leowillfride@gmail.com",
         "role": "admin",
-        "password_hash": pwd_context.hash("Leow1012"),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.users.insert_one(admin)
-    
+        "password_hash": seeder.password_hash("Leow1012"),
+        "created_at": created_at
+    })
+
     print("Creating Department and Course...")
     dept_id = "dept-bca"
     course_id = "course-bca-3"
-    await db.departments.insert_one({
-        "id": dept_id, "name": "Computer Applications", "code": "BCA", "created_at": datetime.now(timezone.utc).isoformat()
+    await seeder.add("departments", {
+        "id": dept_id, "name": "Computer Applications", "code": "BCA", "created_at": created_at
     })
-    await db.courses.insert_one({
-        "id": course_id, "name": "BCA - Year 3", "code": "BCA-Y3", "department_id": dept_id, "year": 3, "created_at": datetime.now(timezone.utc).isoformat()
+    await seeder.add("courses", {
+        "id": course_id, "name": "BCA - Year 3", "code": "BCA-Y3", "department_id": dept_id, "year": 3, "created_at": created_at
     })
-    
+
     print("Creating Faculty and Subjects...")
     # Faculty based on your uploaded table
     staff_list = [
@@ -50,20 +146,17 @@ async def seed_database():
         {"id": "fac-sathya", "name": "Ms. K. Sathya", "college_id": "FAC_SAT_03", "password": "faculty123"},
         {"id": "fac-ganesan", "name": "Dr. A. Ganesan", "college_id": "FAC_GAN_04", "password": "faculty123"}
     ]
-    
-    faculty_users = []
     for staff in staff_list:
-        faculty_users.append({
+        await seeder.add("users", {
             "id": staff["id"],
             "college_id": staff["college_id"],
             "name": staff["name"],
             "email": f"{staff['id']}@scas.edu.in",
             "role": "faculty",
             "department_id": dept_id,
-            "password_hash": pwd_context.hash(staff["password"]),
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "password_hash": seeder.password_hash(staff["password"]),
+            "created_at": created_at
         })
-    await db.users.insert_many(faculty_users)
 
     # Subjects based on your uploaded table
     subjects_data = [
@@ -74,8 +167,8 @@ async def seed_database():
         {"id": "sub-nm", "name": "Cyber Security", "code": "NM", "faculty_id": "fac-shunmuga"}
     ]
     for sub in subjects_data:
-        sub.update({"course_id": course_id, "created_at": datetime.now(timezone.utc).isoformat()})
-    await db.subjects.insert_many(subjects_data)
+        sub.update({"course_id": course_id, "created_at": created_at})
+        await seeder.add("subjects", dict(sub))
 
     print("Creating 23 Students from roster...")
     # Excluding 10 and 11 as requested
@@ -100,29 +193,18 @@ async def seed_database():
             "role": "student",
             "department_id": dept_id,
             "course_id": course_id,
-            "password_hash": pwd_context.hash("student123"), # Default pass for classmates
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "password_hash": seeder.password_hash("student123"), # Default pass for classmates
+            "created_at": created_at
         })
-    await db.users.insert_many(students)
+    for student in students:
+        await seeder.add("users", student)
 
     print("Generating class history for past 10 days...")
     # This creates fake attendance history so your charts look full
     base_date = datetime.now(timezone.utc) - timedelta(days=10)
+    dates = [(base_date + timedelta(days=day)).date().isoformat() for day in range(10)]
     for sub in subjects_data:
-        for day in range(10):
-            session_date = (base_date + timedelta(days=day)).date().isoformat()
-            s_id = f"sess-{sub['code']}-{day}"
-            await db.class_sessions.insert_one({
-                "id": s_id, "subject_id": sub["id"], "faculty_id": sub["faculty_id"],
-                "date": session_date, "created_at": datetime.now(timezone.utc).isoformat()
-            })
-            for stu in students:
-                status = "present" if random.random() < 0.85 else "absent"
-                await db.attendance_records.insert_one({
-                    "id": f"att-{s_id}-{stu['college_id']}", "session_id": s_id,
-                    "student_id": stu["id"], "subject_id": sub["id"], "status": status,
-                    "marked_by": sub["faculty_id"], "created_at": datetime.now(timezone.utc).isoformat()
-                })
+        await add_sessions(seeder, rng, sub, students, dates, {}, created_at)
 
     print("\n✅ BCA Class Database seeded successfully!")
     print(f"Total Students: {len(students)}")
@@ -130,8 +212,133 @@ async def seed_database():
     print("ADMIN: brubk2025 / Leow1012")
     print("FACULTY: FAC_SUG_01 (Ms. Suganya) / faculty123")
     print("STUDENT: 2322J1012 (Your ID) / student123")
-    
+
+
+async def seed_synthetic(seeder: Seeder, rng: random.Random, args, created_at: str):
+    await seeder.add("users", {
+        "id": "admin-001", "college_id": "brubk2025", "name": "Leowillfride A",
+        "email": "leowillfride@gmail.com", "role": "admin",
+        "password_hash": seeder.password_hash("Leow1012"), "created_at": created_at
+    })
+
+    start = date.fromisoformat(args.start_date) if args.start_date else date.today() - timedelta(days=args.days)
+    # Classes run Monday to Saturday
+    dates = []
+    day = start
+    while len(dates) < args.days:
+        if day.weekday() != 6:
+            dates.append(day.isoformat())
+        day += timedelta(days=1)
+
+    student_no = 0
+    faculty_no = 0
+    for d in range(1, args.departments + 1):
+        dept_id = f"dept-{d:03d}"
+        dept_code = f"D{d:03d}"
+        await seeder.add("departments", {"id": dept_id, "name": f"Department {d}", "code": dept_code, "created_at": created_at})
+
+        for c in range(1, args.courses + 1):
+            course_id = f"course-{d:03d}-{c:02d}"
+            course_code = f"{dept_code}-C{c:02d}"
+            await seeder.add("courses", {
+                "id": course_id, "name": f"{dept_code} Course {c}", "code": course_code,
+                "department_id": dept_id, "year": (c - 1) % 4 + 1, "created_at": created_at
+            })
+
+            students = []
+            propensity = {}
+            for _ in range(args.students):
+                student_no += 1
+                reg_no = f"S{student_no:07d}"
+                student = {
+                    "id": f"student-{reg_no}", "college_id": reg_no,
+                    "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(INITIALS)}",
+                    "email": f"{reg_no.lower()}@students.example.edu", "role": "student",
+                    "department_id": dept_id, "course_id": course_id,
+                    "password_hash": seeder.password_hash(args.student_password), "created_at": created_at
+                }
+                students.append(student)
+                # Most students attend regularly; the tail falls below the 75% threshold
+                propensity[student["id"]] = rng.betavariate(8, 1.5)
+                await seeder.add("users", student)
+
+            for s in range(1, args.subjects + 1):
+                faculty_no += 1
+                faculty_id = f"fac-{faculty_no:05d}"
+                await seeder.add("users", {
+                    "id": faculty_id, "college_id": f"FAC{faculty_no:05d}",
+                    "name": f"Prof. {rng.choice(FIRST_NAMES)} {rng.choice(INITIALS)}",
+                    "email": f"{faculty_id}@faculty.example.edu", "role": "faculty",
+                    "department_id": dept_id,
+                    "password_hash": seeder.password_hash(args.faculty_password), "created_at": created_at
+                })
+                subject = {
+                    "id": f"sub-{d:03d}-{c:02d}-{s:02d}", "name": f"{course_code} Subject {s}",
+                    "code": f"{course_code}-S{s:02d}", "course_id": course_id,
+                    "faculty_id": faculty_id, "created_at": created_at
+                }
+                await seeder.add("subjects", dict(subject))
+                await add_sessions(seeder, rng, subject, students, dates, propensity, created_at)
+
+        print(f"  Department {d}/{args.departments} generated ({student_no} students so far)")
+
+    print(f"\n✅ Synthetic database seeded: {student_no} students, {faculty_no} faculty, {len(dates)} days")
+    print(f"ADMIN: brubk2025 / Leow1012, FACULTY: FAC00001 / {args.faculty_password}, STUDENT: S0000001 / {args.student_password}")
+
+
+async def seed_database(args=None):
+    args = args or parse_args([])
+    load_dotenv(Path(__file__).parent / '.env')
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get("DB_NAME", "attendance_system")]
+
+    # Clear existing data; indexes are rebuilt after the load, which is faster than maintaining them
+    archives = [name for name in await db.list_collection_names() if "_archive_" in name]
+    for collection in COLLECTIONS + archives:
+        await db[collection].drop()
+
+    started = time.perf_counter()
+    rng = random.Random(args.seed)
+    created_at = datetime.now(timezone.utc).isoformat()
+    seeder = Seeder(db, batch_size=args.batch_size, writers=args.writers)
+    await seeder.start()
+    try:
+        if args.synthetic:
+            await seed_synthetic(seeder, rng, args, created_at)
+        else:
+            await seed_demo(seeder, rng, created_at)
+    finally:
+        await seeder.close()
+
+    print("Creating indexes...")
+    await ensure_indexes(db)
+    print("Building trend rollups...")
+    trends = await rebuild_trends(db)
+    seeder.inserted["attendance_daily"] = trends["subject_days"]
+    seeder.inserted["student_attendance_daily"] = trends["student_days"]
+    written = ", ".join(f"{collection}={count}" for collection, count in sorted(seeder.inserted.items()))
+    print(f"Wrote {written} in {time.perf_counter() - started:.1f}s")
+
     client.close()
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the attendance database")
+    parser.add_argument("--synthetic", action="store_true", help="generate a synthetic college instead of the demo class")
+    parser.add_argument("--departments", type=int, default=2)
+    parser.add_argument("--courses", type=int, default=2, help="courses per department")
+    parser.add_argument("--subjects", type=int, default=5, help="subjects per course")
+    parser.add_argument("--students", type=int, default=60, help="students per course")
+    parser.add_argument("--days", type=int, default=10, help="teaching days of history")
+    parser.add_argument("--start-date", help="first teaching day (YYYY-MM-DD); defaults to --days ago")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--student-password", default="student123")
+    parser.add_argument("--faculty-password", default="faculty123")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    asyncio.run(seed_database(parse_args()))
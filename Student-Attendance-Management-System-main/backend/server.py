@@ -1,9 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Path as PathParam, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hmac
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
@@ -12,27 +15,147 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
 import jwt
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from indexes import ensure_indexes, index_health
+from attendance_stats import (
+    ATTENDANCE_STATUSES, ensure_stats, get_student_stats, get_subject_stats,
+    record_marks, record_session, record_status_change
+)
+from user_cache import UserCache
+from password_pool import PasswordPool, default_concurrency, default_processes
+from alert_dispatcher import AlertDispatcher, SMTPSettings
+from fast_json import FastJSONResponse, model_response
+from pagination import NEXT_PAGE_HEADER, PageParams, list_documents
+from reference_cache import ReferenceCache
+from eligibility import course_eligibility, course_threshold
+from overview import build_overview
+from live_updates import RECORD_FIELDS, ChangeStreamFeed, EventBroker
+from user_import import UserImport
+from session_sheet import load_session_sheet
+from archival import UnknownTerm, get_student_history, get_term_subject_stats, list_terms, term_collections
+from login_admission import AdmissionRejected, LoginAdmission, client_ip
+from attendance_trends import (
+    ensure_trends, get_trend, record_trend_marks, record_trend_session, record_trend_status_change
+)
+from metrics import MetricsMiddleware, MetricsRegistry, MongoCommandListener
+from diagnostics import DiagnosticsListener, DiagnosticsMiddleware, note_user
+from database import create_client, pool_options, ping, warm_pool
+from exports import RECORD_COLUMNS, REPORT_COLUMNS, record_rows, report_rows, resolve_subjects, stream_csv, stream_xlsx
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Request and Mongo command metrics, served at /api/metrics
+metrics = MetricsRegistry()
+
+# MongoDB connection, opened by the lifespan so each worker builds its own pool
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client = None
+db = None
+change_feed = None
+
+WARMUP_MAX_BACKOFF = 30.0
+
+async def warm_up(app: FastAPI):
+    global change_feed
+    delay = 1.0
+    while True:
+        try:
+            await warm_pool(client, pool_options()["minPoolSize"])
+            await ensure_indexes(db)
+            # Reports and trends read the counters and rollups, so they must exist before this worker is ready
+            if await ensure_stats(db) and await ensure_trends(db):
+                if change_feed is None and os.environ.get("LIVE_CHANGE_STREAMS", "false").lower() == "true":
+                    change_feed = ChangeStreamFeed(db, live_broker)
+                    await change_feed.start()
+                break
+            logger.info(f"Waiting for another worker's migration, retrying in {delay:.0f}s")
+        except Exception:
+            # Stay not ready, so the load balancer keeps traffic away, and try again
+            logger.exception(f"Warmup failed, retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_MAX_BACKOFF)
+    app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, change_feed
+    client = create_client(mongo_url, event_listeners=[MongoCommandListener(metrics), DiagnosticsListener()])
+    db = client[os.environ['DB_NAME']]
+    app.state.mongo_client = client
+    app.state.ready = False
+    await alert_dispatcher.start()
+    
+    # Warm up in the background: the worker accepts connections (live) at once
+    # and reports ready when the pool and indexes are warm
+    warmup = asyncio.create_task(warm_up(app))
+    
+    yield
+    
+    app.state.ready = False
+    warmup.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup
+    if change_feed:
+        await change_feed.stop()
+    await alert_dispatcher.stop()
+    client.close()
+    password_pool.shutdown()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_pool = PasswordPool(pwd_context, concurrency=default_concurrency(), processes=default_processes())
+
+# Logins are rate limited per IP and college_id, and bcrypt verifications are capped
+login_admission = LoginAdmission(
+    ip_per_minute=float(os.environ.get("LOGIN_IP_PER_MINUTE", "300")),
+    ip_burst=int(os.environ.get("LOGIN_IP_BURST", "100")),
+    id_per_minute=float(os.environ.get("LOGIN_ID_PER_MINUTE", "5")),
+    id_burst=int(os.environ.get("LOGIN_ID_BURST", "10")),
+    max_verifications=int(os.environ.get("LOGIN_MAX_VERIFICATIONS", str(password_pool.concurrency * 4)))
+)
+TRUST_FORWARDED_FOR = os.environ.get("TRUST_FORWARDED_FOR", "false").lower() == "true"
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1")) if TRUST_FORWARDED_FOR else 0
+
+# Departments, courses and subjects change rarely; serve them from memory with ETags.
+# Their versions live in Mongo so a write through any worker invalidates all of them
+reference_cache = ReferenceCache(
+    ttl=float(os.environ.get("REFERENCE_CACHE_TTL", "300")),
+    store=lambda: db.cache_versions
+)
+
+# The admin overview is recomputed at most once per OVERVIEW_CACHE_TTL seconds
+overview_cache = ReferenceCache(ttl=float(os.environ.get("OVERVIEW_CACHE_TTL", "30")))
+
+# Live attendance events for connected faculty/admin clients, optionally fed by change streams
+live_broker = EventBroker()
+
+def load_reference(collection):
+    async def loader():
+        return await db[collection].find({}, {"_id": 0}).sort("id", 1).to_list(None)
+    return loader
+
+# Low-attendance emails are sent in the background
+alert_dispatcher = AlertDispatcher(
+    SMTPSettings.from_env(),
+    workers=int(os.environ.get("ALERT_WORKERS", "2")),
+    max_retries=int(os.environ.get("ALERT_MAX_RETRIES", "3")),
+    store=lambda: db.alert_runs
+)
 security = HTTPBearer()
 SECRET_KEY = os.environ.get("JWT_SECRET", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
+STREAM_TOKEN_TTL = int(os.environ.get("STREAM_TOKEN_TTL", "60"))
+
+# Authenticated users, so most requests skip the users lookup
+user_cache = UserCache(
+    max_size=int(os.environ.get("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("USER_CACHE_TTL", "60"))
+)
 
 # Models
 class User(BaseModel):
@@ -78,6 +201,7 @@ class Course(BaseModel):
     code: str
     department_id: str
     year: int
+    attendance_threshold: Optional[float] = None
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class CourseCreate(BaseModel):
@@ -85,6 +209,7 @@ class CourseCreate(BaseModel):
     code: str
     department_id: str
     year: int
+    attendance_threshold: Optional[float] = Field(None, ge=0, le=100)
 
 class Subject(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -132,12 +257,21 @@ class AttendanceCreate(BaseModel):
 class AttendanceUpdate(BaseModel):
     status: str
 
+class AttendanceMark(BaseModel):
+    student_id: str
+    status: str
+
+class BulkAttendanceCreate(BaseModel):
+    records: List[AttendanceMark]
+
+DUPLICATE_KEY_ERROR = 11000
+
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_pool.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -145,68 +279,67 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_stream_token(user_id: str, subject_id: str) -> str:
+    # Only good for opening one subject's stream, and only briefly, since it travels in the URL
+    expire = datetime.now(timezone.utc) + timedelta(seconds=STREAM_TOKEN_TTL)
+    return jwt.encode({"sub": user_id, "scope": f"stream:{subject_id}", "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+async def collections_for_term(term: Optional[str]):
+    # Archived terms are read from their own collections
+    try:
+        return await term_collections(db, term)
+    except UnknownTerm:
+        raise HTTPException(status_code=404, detail="Term not found in the archive")
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
+async def get_stream_user(request: Request, token: Optional[str] = Query(None)):
+    # EventSource cannot set headers, so streams also accept a stream token as ?token=
+    scheme, _, header_token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and header_token:
+        return await user_from_token(header_token)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await user_from_token(token, scope=f"stream:{request.path_params['subject_id']}")
+
+async def user_from_token(token: str, scope: Optional[str] = None) -> dict:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
-        if not user_id:
+        # Login tokens carry no scope; scoped tokens only open what they were issued for
+        if not user_id or payload.get("scope") != scope:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_cache.set(user_id, user)
+        note_user(user)
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def send_email_alert(to_email: str, student_name: str, subject_name: str, attendance_percentage: float):
-    """Send email alert for low attendance"""
-    smtp_host = os.environ.get("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.environ.get("SMTP_PORT", "587"))
-    smtp_user = os.environ.get("SMTP_USER", "")
-    smtp_password = os.environ.get("SMTP_PASSWORD", "")
-    
-    if not smtp_user or not smtp_password:
-        logging.warning("SMTP credentials not configured")
-        return
-    
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = smtp_user
-        msg['To'] = to_email
-        msg['Subject'] = f"Low Attendance Alert - {subject_name}"
-        
-        body = f"""
-        Dear {student_name},
-        
-        This is to inform you that your attendance in {subject_name} is currently at {attendance_percentage:.2f}%.
-        
-        The minimum required attendance for exam eligibility is 75%.
-        
-        Please ensure regular attendance to maintain eligibility.
-        
-        Regards,
-        Academic Department
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-        
-        logging.info(f"Email sent to {to_email}")
-    except Exception as e:
-        logging.error(f"Failed to send email: {str(e)}")
-
 # Auth routes
 @api_router.post("/auth/login")
-async def login(request: LoginRequest):
-    user = await db.users.find_one({"college_id": request.college_id}, {"_id": 0})
-    if not user or not verify_password(request.password, user["password_hash"]):
+async def login(request: LoginRequest, http_request: Request):
+    ip = client_ip(http_request.client, http_request.headers.get("x-forwarded-for"), TRUSTED_PROXY_HOPS)
+    try:
+        await login_admission.admit(request.college_id, ip)
+        user = await db.users.find_one({"college_id": request.college_id}, {"_id": 0})
+        if user:
+            with login_admission.verification():
+                valid = await verify_password(request.password, user["password_hash"])
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if not user or not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"sub": user["id"], "role": user["role"]})
@@ -233,12 +366,12 @@ async def create_department(dept: DepartmentCreate, current_user: dict = Depends
     
     department = Department(**dept.model_dump())
     await db.departments.insert_one(department.model_dump())
-    return department
+    await reference_cache.bump("departments")
+    return model_response(department)
 
 @api_router.get("/admin/departments")
-async def get_departments(current_user: dict = Depends(get_current_user)):
-    departments = await db.departments.find({}, {"_id": 0}).to_list(1000)
-    return departments
+async def get_departments(request: Request, current_user: dict = Depends(get_current_user)):
+    return await reference_cache.respond("departments", request, load_reference("departments"))
 
 @api_router.post("/admin/courses", response_model=Course)
 async def create_course(course: CourseCreate, current_user: dict = Depends(get_current_user)):
@@ -247,12 +380,39 @@ async def create_course(course: CourseCreate, current_user: dict = Depends(get_c
     
     course_obj = Course(**course.model_dump())
     await db.courses.insert_one(course_obj.model_dump())
-    return course_obj
+    await reference_cache.bump("courses")
+    return model_response(course_obj)
 
 @api_router.get("/admin/courses")
-async def get_courses(current_user: dict = Depends(get_current_user)):
-    courses = await db.courses.find({}, {"_id": 0}).to_list(1000)
-    return courses
+async def get_courses(request: Request, page: PageParams = Depends(), current_user: dict = Depends(get_current_user)):
+    if page.limit is None and page.after is None and page.format == "json":
+        return await reference_cache.respond("courses", request, load_reference("courses"))
+    return await list_documents(db.courses, {}, {"_id": 0}, page)
+
+@api_router.put("/admin/courses/{course_id}/threshold")
+async def set_course_threshold(course_id: str, threshold: Optional[float] = Query(None, ge=0, le=100), current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    # Without a threshold the course falls back to ATTENDANCE_THRESHOLD
+    update = {"$set": {"attendance_threshold": threshold}} if threshold is not None else {"$unset": {"attendance_threshold": ""}}
+    result = await db.courses.update_one({"id": course_id}, update)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Course not found")
+    await reference_cache.bump("courses")
+    
+    return {"message": "Attendance threshold updated successfully", "threshold": threshold}
+
+@api_router.get("/admin/courses/{course_id}/eligibility")
+async def get_course_eligibility(course_id: str, remaining: int = Query(0, ge=0), current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    course = await db.courses.find_one({"id": course_id}, {"_id": 0})
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    return FastJSONResponse(await course_eligibility(db, course, remaining))
 
 @api_router.post("/admin/subjects", response_model=Subject)
 async def create_subject(subject: SubjectCreate, current_user: dict = Depends(get_current_user)):
@@ -261,12 +421,14 @@ async def create_subject(subject: SubjectCreate, current_user: dict = Depends(ge
     
     subject_obj = Subject(**subject.model_dump())
     await db.subjects.insert_one(subject_obj.model_dump())
-    return subject_obj
+    await reference_cache.bump("subjects")
+    return model_response(subject_obj)
 
 @api_router.get("/admin/subjects")
-async def get_subjects(current_user: dict = Depends(get_current_user)):
-    subjects = await db.subjects.find({}, {"_id": 0}).to_list(1000)
-    return subjects
+async def get_subjects(request: Request, page: PageParams = Depends(), current_user: dict = Depends(get_current_user)):
+    if page.limit is None and page.after is None and page.format == "json":
+        return await reference_cache.respond("subjects", request, load_reference("subjects"))
+    return await list_documents(db.subjects, {}, {"_id": 0}, page)
 
 @api_router.post("/admin/users", response_model=User)
 async def create_user(user_create: UserCreate, current_user: dict = Depends(get_current_user)):
@@ -280,19 +442,29 @@ async def create_user(user_create: UserCreate, current_user: dict = Depends(get_
     
     user_dict = user_create.model_dump()
     password = user_dict.pop("password")
-    user_dict["password_hash"] = hash_password(password)
+    user_dict["password_hash"] = await hash_password(password)
     
     user = User(**user_dict)
     await db.users.insert_one(user.model_dump())
-    return user
+    return model_response(user)
+
+@api_router.post("/admin/users/import")
+async def import_users(request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    importer = UserImport(
+        db, UserCreate, User, password_pool.hash_many,
+        batch_size=int(os.environ.get("USER_IMPORT_BATCH_SIZE", "500"))
+    )
+    return await importer.run(request.stream())
 
 @api_router.get("/admin/users")
-async def get_users(current_user: dict = Depends(get_current_user)):
+async def get_users(page: PageParams = Depends(), current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return users
+    return await list_documents(db.users, {}, {"_id": 0, "password_hash": 0}, page)
 
 @api_router.put("/admin/users/{user_id}")
 async def update_user(user_id: str, user_update: UserCreate, current_user: dict = Depends(get_current_user)):
@@ -302,9 +474,10 @@ async def update_user(user_id: str, user_update: UserCreate, current_user: dict
     update_dict = user_update.model_dump()
     if "password" in update_dict:
         password = update_dict.pop("password")
-        update_dict["password_hash"] = hash_password(password)
+        update_dict["password_hash"] = await hash_password(password)
     
     result = await db.users.update_one({"id": user_id}, {"$set": update_dict})
+    user_cache.invalidate(user_id)
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -316,6 +489,7 @@ async def delete_user(user_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=403, detail="Admin access required")
     
     result = await db.users.delete_one({"id": user_id})
+    user_cache.invalidate(user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -327,11 +501,54 @@ async def assign_faculty(subject_id: str, faculty_id: str, current_user: dict =
         raise HTTPException(status_code=403, detail="Admin access required")
     
     result = await db.subjects.update_one({"id": subject_id}, {"$set": {"faculty_id": faculty_id}})
+    await reference_cache.bump("subjects")
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Subject not found")
     
     return {"message": "Faculty assigned successfully"}
 
+@api_router.get("/admin/user-cache")
+async def get_user_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return user_cache.stats()
+
+@api_router.get("/admin/reference-cache")
+async def get_reference_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {**reference_cache.stats(), "overview": overview_cache.stats()}
+
+@api_router.get("/admin/live-updates")
+async def get_live_update_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return live_broker.stats()
+
+@api_router.get("/admin/login-admission")
+async def get_login_admission_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return login_admission.stats()
+
+@api_router.get("/admin/password-pool")
+async def get_password_pool_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return password_pool.stats()
+
+@api_router.get("/admin/indexes")
+async def get_index_health(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await index_health(db)
+
 # Faculty routes
 @api_router.post("/faculty/sessions", response_model=ClassSession)
 async def create_session(session: ClassSessionCreate, current_user: dict = Depends(get_current_user)):
@@ -342,15 +559,40 @@ async def create_session(session: ClassSessionCreate, current_user: dict = Depen
     session_dict["faculty_id"] = current_user["id"]
     session_obj = ClassSession(**session_dict)
     await db.class_sessions.insert_one(session_obj.model_dump())
-    return session_obj
+    await record_session(db, session_obj.subject_id)
+    await record_trend_session(db, session_obj.model_dump())
+    live_broker.emit(session_obj.subject_id, "session.created", {"session": session_obj.model_dump()})
+    return model_response(session_obj)
 
 @api_router.get("/faculty/sessions")
-async def get_faculty_sessions(current_user: dict = Depends(get_current_user)):
+async def get_faculty_sessions(
+    term: Optional[str] = None,
+    subject_id: Optional[str] = None,
+    date: Optional[str] = None,
+    page: PageParams = Depends(),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "faculty":
         raise HTTPException(status_code=403, detail="Faculty access required")
     
-    sessions = await db.class_sessions.find({"faculty_id": current_user["id"]}, {"_id": 0}).to_list(1000)
-    return sessions
+    sessions, _ = await collections_for_term(term)
+    query = {"faculty_id": current_user["id"]}
+    # Filtered on the server, so finding one session does not depend on the page it falls on
+    if subject_id:
+        query["subject_id"] = subject_id
+    if date:
+        query["date"] = date
+    return await list_documents(sessions, query, {"_id": 0}, page)
+
+@api_router.get("/faculty/sessions/{session_id}/sheet")
+async def get_session_sheet(session_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "faculty":
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    sheet = await load_session_sheet(db, session_id)
+    if not sheet:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return FastJSONResponse(sheet)
 
 @api_router.post("/faculty/attendance", response_model=AttendanceRecord)
 async def mark_attendance(attendance: AttendanceCreate, current_user: dict = Depends(get_current_user)):
@@ -369,30 +611,154 @@ async def mark_attendance(attendance: AttendanceCreate, current_user: dict = Dep
     attendance_dict = attendance.model_dump()
     attendance_dict["marked_by"] = current_user["id"]
     attendance_obj = AttendanceRecord(**attendance_dict)
-    await db.attendance_records.insert_one(attendance_obj.model_dump())
-    return attendance_obj
+    try:
+        await db.attendance_records.insert_one(attendance_obj.model_dump())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Attendance already marked for this session")
+    await record_marks(db, attendance_obj.subject_id, [(attendance_obj.student_id, attendance_obj.status)])
+    session = await db.class_sessions.find_one({"id": attendance_obj.session_id}, {"_id": 0, "subject_id": 1, "date": 1})
+    if session:
+        await record_trend_marks(db, session, [(attendance_obj.student_id, attendance_obj.status)])
+    live_broker.emit(attendance_obj.subject_id, "attendance.marked", {
+        "records": [{field: getattr(attendance_obj, field) for field in RECORD_FIELDS}]
+    })
+    return model_response(attendance_obj)
+
+@api_router.post("/faculty/sessions/{session_id}/attendance")
+async def mark_session_attendance(session_id: str, bulk: BulkAttendanceCreate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "faculty":
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    session = await db.class_sessions.find_one({"id": session_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    subject = await db.subjects.find_one({"id": session["subject_id"]}, {"_id": 0, "course_id": 1})
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    
+    # Roster and existing marks are fetched once for the whole payload
+    student_ids = list({mark.student_id for mark in bulk.records})
+    roster = await db.users.find(
+        {"role": "student", "course_id": subject["course_id"], "id": {"$in": student_ids}},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    enrolled = {student["id"] for student in roster}
+    marked = await db.attendance_records.find(
+        {"session_id": session_id, "student_id": {"$in": student_ids}},
+        {"_id": 0, "student_id": 1}
+    ).to_list(None)
+    already_marked = {record["student_id"] for record in marked}
+    
+    results = []
+    to_insert = []
+    for mark in bulk.records:
+        if mark.status not in ATTENDANCE_STATUSES:
+            results.append({"student_id": mark.student_id, "result": "invalid", "detail": "Invalid status"})
+        elif mark.student_id not in enrolled:
+            results.append({"student_id": mark.student_id, "result": "invalid", "detail": "Student not enrolled in this course"})
+        elif mark.student_id in already_marked:
+            results.append({"student_id": mark.student_id, "result": "duplicate", "detail": "Attendance already marked for this session"})
+        else:
+            already_marked.add(mark.student_id)
+            record = AttendanceRecord(
+                session_id=session_id,
+                student_id=mark.student_id,
+                subject_id=session["subject_id"],
+                status=mark.status,
+                marked_by=current_user["id"]
+            )
+            to_insert.append(record.model_dump())
+            results.append({"student_id": mark.student_id, "result": "inserted", "id": record.id})
+    
+    if to_insert:
+        try:
+            await db.attendance_records.insert_many(to_insert, ordered=False)
+        except BulkWriteError as e:
+            # Another request marked some of these students concurrently
+            failed = {to_insert[err["index"]]["student_id"]: err for err in e.details.get("writeErrors", [])}
+            for result in results:
+                err = failed.get(result["student_id"])
+                if result["result"] == "inserted" and err:
+                    result.pop("id")
+                    if err.get("code") == DUPLICATE_KEY_ERROR:
+                        result.update({"result": "duplicate", "detail": "Attendance already marked for this session"})
+                    else:
+                        result.update({"result": "invalid", "detail": err.get("errmsg", "Write failed")})
+        
+        inserted_ids = {result["id"] for result in results if result["result"] == "inserted"}
+        inserted_marks = [(record["student_id"], record["status"]) for record in to_insert if record["id"] in inserted_ids]
+        await record_marks(db, session["subject_id"], inserted_marks)
+        await record_trend_marks(db, session, inserted_marks)
+        live_broker.emit(session["subject_id"], "attendance.marked", {
+            "records": [{field: record[field] for field in RECORD_FIELDS} for record in to_insert if record["id"] in inserted_ids]
+        })
+    
+    summary = {"inserted": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        summary[result["result"]] += 1
+    
+    return {"session_id": session_id, **summary, "results": results}
+
+SUBJECT_RECORDS_DEFAULT_LIMIT = 10000
 
 @api_router.get("/faculty/attendance/{subject_id}")
-async def get_subject_attendance(subject_id: str, current_user: dict = Depends(get_current_user)):
+async def get_subject_attendance(subject_id: str, term: Optional[str] = None, page: PageParams = Depends(), current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "faculty":
         raise HTTPException(status_code=403, detail="Faculty access required")
     
-    records = await db.attendance_records.find({"subject_id": subject_id}, {"_id": 0}).to_list(10000)
-    return records
+    _, records = await collections_for_term(term)
+    # Unpaged callers have always received up to 10000 records here
+    return await list_documents(records, {"subject_id": subject_id}, {"_id": 0}, page, default_limit=SUBJECT_RECORDS_DEFAULT_LIMIT)
 
 @api_router.put("/faculty/attendance/{attendance_id}")
 async def update_attendance(attendance_id: str, update: AttendanceUpdate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "faculty":
         raise HTTPException(status_code=403, detail="Faculty access required")
     
-    result = await db.attendance_records.update_one({"id": attendance_id}, {"$set": {"status": update.status}})
-    if result.modified_count == 0:
+    # Matching only a changed status keeps the previous 404 for no-op updates
+    previous = await db.attendance_records.find_one_and_update(
+        {"id": attendance_id, "status": {"$ne": update.status}},
+        {"$set": {"status": update.status}},
+        projection={"_id": 0, "session_id": 1, "subject_id": 1, "student_id": 1, "status": 1}
+    )
+    if not previous:
         raise HTTPException(status_code=404, detail="Attendance record not found")
     
+    await record_status_change(db, previous["subject_id"], previous["student_id"], previous["status"], update.status)
+    session = await db.class_sessions.find_one({"id": previous["session_id"]}, {"_id": 0, "subject_id": 1, "date": 1})
+    if session:
+        await record_trend_status_change(db, session, previous["student_id"], previous["status"], update.status)
+    live_broker.emit(previous["subject_id"], "attendance.updated", {
+        "id": attendance_id,
+        "session_id": previous["session_id"],
+        "student_id": previous["student_id"],
+        "old_status": previous["status"],
+        "status": update.status
+    })
+    
     return {"message": "Attendance updated successfully"}
 
+@api_router.post("/live/subjects/{subject_id}/token")
+async def create_subject_stream_token(subject_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    return {"token": create_stream_token(current_user["id"], subject_id), "expires_in": STREAM_TOKEN_TTL}
+
+@api_router.get("/live/subjects/{subject_id}")
+async def stream_subject_events(subject_id: str, request: Request, current_user: dict = Depends(get_stream_user)):
+    if current_user["role"] not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    return StreamingResponse(
+        live_broker.stream(subject_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/faculty/reports/{subject_id}")
-async def get_faculty_report(subject_id: str, current_user: dict = Depends(get_current_user)):
+async def get_faculty_report(subject_id: str, term: Optional[str] = None, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "faculty":
         raise HTTPException(status_code=403, detail="Faculty access required")
     
@@ -402,23 +768,29 @@ async def get_faculty_report(subject_id: str, current_user: dict = Depends(get_c
         raise HTTPException(status_code=404, detail="Subject not found")
     
     course = await db.courses.find_one({"id": subject["course_id"]}, {"_id": 0})
-    students = await db.users.find({"role": "student", "course_id": subject["course_id"]}, {"_id": 0}).to_list(1000)
     
-    # Get all sessions for this subject
-    sessions = await db.class_sessions.find({"subject_id": subject_id}, {"_id": 0}).to_list(1000)
-    total_classes = len(sessions)
+    if term:
+        await collections_for_term(term)
+        total_classes, present_counts = await get_term_subject_stats(db, term, subject_id)
+        # An archived term's roster is whoever was marked in it, including students who have left since
+        students = await db.users.find({"id": {"$in": list(present_counts)}}, {"_id": 0}).to_list(None)
+        known = {student["id"] for student in students}
+        students += [
+            {"id": student_id, "name": None, "college_id": None, "email": None}
+            for student_id in present_counts if student_id not in known
+        ]
+    else:
+        students = await db.users.find({"role": "student", "course_id": subject["course_id"]}, {"_id": 0}).to_list(None)
+        total_classes, present_counts = await get_subject_stats(db, subject_id)
+    threshold = course_threshold(course)
     
     # Calculate attendance for each student
     report = []
     for student in students:
-        attended = await db.attendance_records.count_documents({
-            "subject_id": subject_id,
-            "student_id": student["id"],
-            "status": "present"
-        })
+        attended = present_counts.get(student["id"], 0)
         
         percentage = (attended / total_classes * 100) if total_classes > 0 else 0
-        eligible = percentage >= 75
+        eligible = percentage >= threshold
         
         report.append({
             "student_id": student["id"],
@@ -431,12 +803,14 @@ async def get_faculty_report(subject_id: str, current_user: dict = Depends(get_c
             "eligible": eligible
         })
     
-    return {
+    return FastJSONResponse({
         "subject": subject,
         "course": course,
+        "term": term,
         "total_classes": total_classes,
+        "threshold": threshold,
         "students": report
-    }
+    })
 
 @api_router.post("/faculty/send-alerts/{subject_id}")
 async def send_alerts(subject_id: str, current_user: dict = Depends(get_current_user)):
@@ -449,56 +823,93 @@ async def send_alerts(subject_id: str, current_user: dict = Depends(get_current_
         raise HTTPException(status_code=404, detail="Subject not found")
     
     course = await db.courses.find_one({"id": subject["course_id"]}, {"_id": 0})
-    students = await db.users.find({"role": "student", "course_id": subject["course_id"]}, {"_id": 0}).to_list(1000)
+    students = await db.users.find({"role": "student", "course_id": subject["course_id"]}, {"_id": 0}).to_list(None)
     
-    sessions = await db.class_sessions.find({"subject_id": subject_id}, {"_id": 0}).to_list(1000)
-    total_classes = len(sessions)
+    total_classes, present_counts = await get_subject_stats(db, subject_id)
+    threshold = course_threshold(course)
     
-    alerts_sent = 0
+    alerts = []
     for student in students:
-        attended = await db.attendance_records.count_documents({
-            "subject_id": subject_id,
-            "student_id": student["id"],
-            "status": "present"
-        })
+        attended = present_counts.get(student["id"], 0)
         
         percentage = (attended / total_classes * 100) if total_classes > 0 else 0
         
-        if percentage < 75:
-            await send_email_alert(student["email"], student["name"], subject["name"], percentage)
-            alerts_sent += 1
+        if percentage < threshold:
+            alerts.append((student["email"], student["name"], subject["name"], percentage))
     
-    return {"message": f"Sent {alerts_sent} alerts", "total_students": len(students)}
+    run = await alert_dispatcher.submit(alerts, threshold)
+    return {"message": f"Queued {len(alerts)} alerts", "total_students": len(students), "run_id": run.id}
 
-# Student routes
-@api_router.get("/student/attendance")
-async def get_student_attendance(current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "student":
-        raise HTTPException(status_code=403, detail="Student access required")
+@api_router.get("/faculty/alert-runs/{run_id}")
+async def get_alert_run(run_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    run = await alert_dispatcher.run_status(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Alert run not found")
+    
+    return run
+
+# Exports
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+@api_router.get("/exports/{scope}/{scope_id}")
+async def export_attendance(
+    scope: str = PathParam(..., pattern="^(subject|course|department)$"),
+    scope_id: str = PathParam(...),
+    kind: str = Query("report", pattern="^(report|records)$"),
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Faculty access required")
     
+    subjects = await resolve_subjects(db, scope, scope_id)
+    if not subjects:
+        raise HTTPException(status_code=404, detail="No subjects found for export")
+    
+    if kind == "report":
+        columns, rows = REPORT_COLUMNS, report_rows(db, subjects)
+    else:
+        columns, rows = RECORD_COLUMNS, record_rows(db, subjects)
+    body = stream_csv(columns, rows) if format == "csv" else stream_xlsx(columns, rows)
+    
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in scope_id)
+    filename = f"attendance-{kind}-{scope}-{safe_id}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Student routes
+async def build_student_dashboard(current_user: dict) -> dict:
+    """Per-subject attendance and overall eligibility for a student in one pass"""
     # Get student's course
     course = await db.courses.find_one({"id": current_user.get("course_id")}, {"_id": 0})
     if not course:
-        return {"subjects": []}
+        subjects = []
+    else:
+        # Get all subjects for this course
+        subjects = await db.subjects.find({"course_id": course["id"]}, {"_id": 0}).to_list(1000)
+    
+    subject_ids = [subject["id"] for subject in subjects]
     
-    # Get all subjects for this course
-    subjects = await db.subjects.find({"course_id": course["id"]}, {"_id": 0}).to_list(1000)
+    # Session totals and present counts for every subject from the counters
+    totals, attended_counts = await get_student_stats(db, current_user["id"], subject_ids)
+    threshold = course_threshold(course)
     
     attendance_data = []
     for subject in subjects:
-        # Get total sessions
-        sessions = await db.class_sessions.find({"subject_id": subject["id"]}, {"_id": 0}).to_list(1000)
-        total_classes = len(sessions)
-        
-        # Get attended sessions
-        attended = await db.attendance_records.count_documents({
-            "subject_id": subject["id"],
-            "student_id": current_user["id"],
-            "status": "present"
-        })
+        total_classes = totals.get(subject["id"], 0)
+        attended = attended_counts.get(subject["id"], 0)
         
         percentage = (attended / total_classes * 100) if total_classes > 0 else 0
-        eligible = percentage >= 75
+        eligible = percentage >= threshold
         
         attendance_data.append({
             "subject_id": subject["id"],
@@ -510,45 +921,133 @@ async def get_student_attendance(current_user: dict = Depends(get_current_user))
             "eligible": eligible
         })
     
-    return {"subjects": attendance_data}
+    eligible_count = sum(1 for s in attendance_data if s["eligible"])
+    total_subjects = len(attendance_data)
+    
+    return {
+        "subjects": attendance_data,
+        "eligibility": {
+            "eligible_subjects": eligible_count,
+            "total_subjects": total_subjects,
+            "threshold": threshold,
+            "overall_eligible": eligible_count == total_subjects and total_subjects > 0
+        }
+    }
+
+@api_router.get("/student/dashboard")
+async def get_student_dashboard(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "student":
+        raise HTTPException(status_code=403, detail="Student access required")
+    
+    return FastJSONResponse(await build_student_dashboard(current_user))
+
+@api_router.get("/student/attendance")
+async def get_student_attendance(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "student":
+        raise HTTPException(status_code=403, detail="Student access required")
+    
+    dashboard = await build_student_dashboard(current_user)
+    return {"subjects": dashboard["subjects"]}
 
 @api_router.get("/student/eligibility")
 async def get_eligibility(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Student access required")
     
-    attendance = await get_student_attendance(current_user)
-    eligible_count = sum(1 for s in attendance["subjects"] if s["eligible"])
-    total_subjects = len(attendance["subjects"])
+    dashboard = await build_student_dashboard(current_user)
+    return dashboard["eligibility"]
+
+@api_router.get("/student/history")
+async def get_student_history_route(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "student":
+        raise HTTPException(status_code=403, detail="Student access required")
     
-    return {
-        "eligible_subjects": eligible_count,
-        "total_subjects": total_subjects,
-        "overall_eligible": eligible_count == total_subjects and total_subjects > 0
+    rows = await get_student_history(db, current_user["id"])
+    subjects = {
+        subject["id"]: subject
+        for subject in await db.subjects.find(
+            {"id": {"$in": list({row["subject_id"] for row in rows})}}, {"_id": 0, "id": 1, "name": 1, "code": 1}
+        ).to_list(None)
     }
+    by_term = {}
+    for row in rows:
+        subject = subjects.get(row["subject_id"], {})
+        total_classes = row["total_sessions"]
+        attended = row.get("present", 0)
+        by_term.setdefault(row["term"], []).append({
+            "subject_id": row["subject_id"],
+            "subject_name": subject.get("name"),
+            "subject_code": subject.get("code"),
+            "total_classes": total_classes,
+            "attended": attended,
+            "percentage": round(attended / total_classes * 100, 2) if total_classes > 0 else 0
+        })
+    
+    terms = [
+        {"term": term["term"], "start": term["start"], "end": term["end"], "subjects": by_term[term["term"]]}
+        for term in await list_terms(db) if term["term"] in by_term
+    ]
+    return FastJSONResponse({"terms": terms})
+
+# Archive
+@api_router.get("/archive/terms")
+async def get_archived_terms(current_user: dict = Depends(get_current_user)):
+    return await list_terms(db)
+
+# Trends
+@api_router.get("/trends/{scope}/{scope_id}")
+async def get_attendance_trend(
+    scope: str = PathParam(..., pattern="^(subject|course|department|student)$"),
+    scope_id: str = PathParam(...),
+    granularity: str = Query("daily", pattern="^(daily|weekly)$"),
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] == "student":
+        if scope != "student" or scope_id != current_user["id"]:
+            raise HTTPException(status_code=403, detail="Students can only view their own trend")
+    elif current_user["role"] not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Faculty access required")
+    
+    series = await get_trend(db, scope, scope_id, granularity, start, end)
+    return FastJSONResponse({"scope": scope, "scope_id": scope_id, "granularity": granularity, "series": series})
 
 # Reports
 @api_router.get("/reports/overall")
-async def get_overall_report(current_user: dict = Depends(get_current_user)):
+async def get_overall_report(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_students = await db.users.count_documents({"role": "student"})
-    total_faculty = await db.users.count_documents({"role": "faculty"})
-    total_subjects = await db.subjects.count_documents({})
-    total_sessions = await db.class_sessions.count_documents({})
-    
-    return {
-        "total_students": total_students,
-        "total_faculty": total_faculty,
-        "total_subjects": total_subjects,
-        "total_sessions": total_sessions
-    }
+    return await overview_cache.respond("overview", request, lambda: build_overview(db))
 
 @api_router.get("/courses/{course_id}/students")
-async def get_course_students(course_id: str, current_user: dict = Depends(get_current_user)):
-    students = await db.users.find({"role": "student", "course_id": course_id}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return students
+async def get_course_students(course_id: str, page: PageParams = Depends(), current_user: dict = Depends(get_current_user)):
+    return await list_documents(db.users, {"role": "student", "course_id": course_id}, {"_id": 0, "password_hash": 0}, page)
+
+# Health checks
+@api_router.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def health_ready(request: Request, response: Response):
+    if not getattr(request.app.state, "ready", False) or not await ping(client):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable"}
+    return {"status": "ready"}
+
+# Scrapers authenticate with METRICS_TOKEN; without it only admins can read metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    if not (METRICS_TOKEN and hmac.compare_digest(credentials.credentials, METRICS_TOKEN)):
+        current_user = await user_from_token(credentials.credentials)
+        if current_user["role"] != "admin":
+            raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # Include router
 app.include_router(api_router)
@@ -559,14 +1058,14 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_PAGE_HEADER, "ETag", "Retry-After"],
 )
+# Admins can send X-Diagnostics: 1 to get the Mongo operations behind a response
+app.add_middleware(DiagnosticsMiddleware)
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,76 @@
+"""Attendance sheet for one class session, loaded with a single aggregation.
+
+Starting from the session, `$lookup` stages join its subject, the subject's
+course and the course roster. A nested `$lookup` attaches each student's mark
+for the session, so the grid renders from one round trip. Every stage projects
+only the fields the grid shows. On MongoDB 5.0+ the `$expr` equality matches
+in the joins use the `(role, course_id)` index on users and the unique
+`(session_id, student_id)` index on attendance_records.
+"""
+from typing import Optional
+
+
+def _join(collection: str, let: dict, match: dict, fields: list, name: str, extra: Optional[list] = None) -> dict:
+    return {"$lookup": {
+        "from": collection,
+        "let": let,
+        "pipeline": [
+            {"$match": {"$expr": match}},
+            *(extra or []),
+            {"$project": {"_id": 0, **{field: 1 for field in fields}}},
+        ],
+        "as": name,
+    }}
+
+
+def sheet_pipeline(session_id: str) -> list:
+    marks = _join(
+        "attendance_records",
+        {"student_id": "$id", "session_id": "$$session_id"},
+        {"$and": [{"$eq": ["$session_id", "$$session_id"]}, {"$eq": ["$student_id", "$$student_id"]}]},
+        ["id", "status"],
+        "marks",
+    )
+    roster = _join(
+        "users",
+        {"course_id": "$subject.course_id", "session_id": "$id"},
+        {"$and": [{"$eq": ["$role", "student"]}, {"$eq": ["$course_id", "$$course_id"]}]},
+        ["id", "name", "college_id", "marks"],
+        "students",
+        extra=[{"$sort": {"college_id": 1}}, marks],
+    )
+    return [
+        {"$match": {"id": session_id}},
+        {"$project": {"_id": 0, "id": 1, "subject_id": 1, "faculty_id": 1, "date": 1}},
+        _join("subjects", {"subject_id": "$subject_id"}, {"$eq": ["$id", "$$subject_id"]},
+              ["id", "name", "code", "course_id"], "subject"),
+        {"$unwind": "$subject"},
+        _join("courses", {"course_id": "$subject.course_id"}, {"$eq": ["$id", "$$course_id"]},
+              ["id", "name", "code"], "course"),
+        {"$unwind": {"path": "$course", "preserveNullAndEmptyArrays": True}},
+        roster,
+    ]
+
+
+async def load_session_sheet(db, session_id: str) -> Optional[dict]:
+    docs = await db.class_sessions.aggregate(sheet_pipeline(session_id)).to_list(1)
+    if not docs:
+        return None
+    doc = docs[0]
+
+    students = []
+    for student in doc.pop("students"):
+        marks = student.pop("marks", [])
+        mark = marks[0] if marks else None
+        students.append({
+            **student,
+            "status": mark["status"] if mark else None,
+            "record_id": mark["id"] if mark else None,
+        })
+    return {
+        "session": {field: doc[field] for field in ("id", "subject_id", "faculty_id", "date")},
+        "subject": doc["subject"],
+        "course": doc.get("course"),
+        "students": students,
+        "marked": sum(1 for student in students if student["status"]),
+    }
@@ -0,0 +1,157 @@
+"""Bulk user import from a streamed CSV body.
+
+The header row names UserCreate fields (college_id, name, email, password,
+role, department_id, course_id); empty cells count as missing. Rows are
+processed in batches: each row is validated with the same model as
+`POST /api/admin/users`, duplicates are found with one `$in` query per batch
+(plus a check across the file itself), passwords are hashed on the process
+pool and the batch is written with a single unordered `insert_many`.
+"""
+import codecs
+import csv
+from typing import AsyncIterator, Callable, List, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, list]]:
+    """(line number, cells) for each non-blank CSV record as the body arrives.
+
+    A record is complete once it holds an even number of quotes, so quoted
+    cells may span lines and chunk boundaries.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record = ""
+    line_no = 0
+    start = 1
+
+    def parse(text: str) -> Tuple[int, list]:
+        nonlocal start
+        row = (start, next(csv.reader([text]), []))
+        start = line_no + 1
+        return row
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_no += 1
+            record += line.rstrip("\r") + "\n"
+            if record.count('"') % 2 == 0:
+                row = parse(record)
+                record = ""
+                if any(cell.strip() for cell in row[1]):
+                    yield row
+
+    record += pending + decoder.decode(b"", final=True)
+    if record.strip():
+        line_no += 1
+        row = parse(record)
+        if any(cell.strip() for cell in row[1]):
+            yield row
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+
+
+class UserImport:
+    def __init__(self, db, create_model, user_model, hash_many: Callable, batch_size: int = 500):
+        self.db = db
+        self.create_model = create_model
+        self.user_model = user_model
+        self.hash_many = hash_many
+        self.batch_size = batch_size
+        self.seen = set()
+        self.total_rows = 0
+        self.inserted = 0
+        self.errors = []
+
+    def _error(self, line: int, college_id, messages: List[str]):
+        self.errors.append({"line": line, "college_id": college_id, "errors": messages})
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> dict:
+        header = None
+        batch = []
+        async for line, cells in csv_rows(chunks):
+            if header is None:
+                header = [cell.strip() for cell in cells]
+                missing = {"college_id", "name", "email", "password", "role"} - set(header)
+                if missing:
+                    self._error(line, None, [f"Missing columns: {', '.join(sorted(missing))}"])
+                    break
+                continue
+            self.total_rows += 1
+            batch.append((line, cells))
+            if len(batch) >= self.batch_size:
+                await self._process(header, batch)
+                batch = []
+        if batch:
+            await self._process(header, batch)
+
+        return {
+            "total_rows": self.total_rows,
+            "inserted": self.inserted,
+            "failed": self.total_rows - self.inserted,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+    async def _process(self, header: List[str], batch: List[Tuple[int, list]]):
+        valid = []
+        for line, cells in batch:
+            if len(cells) != len(header):
+                self._error(line, None, [f"Expected {len(header)} columns, found {len(cells)}"])
+                continue
+            data = {name: value.strip() for name, value in zip(header, cells) if value.strip()}
+            try:
+                user = self.create_model(**data)
+            except ValidationError as e:
+                self._error(line, data.get("college_id"), _validation_messages(e))
+                continue
+            if user.college_id in self.seen:
+                self._error(line, user.college_id, ["College ID appears earlier in the file"])
+                continue
+            self.seen.add(user.college_id)
+            valid.append((line, user))
+
+        if not valid:
+            return
+        existing = {
+            doc["college_id"]
+            async for doc in self.db.users.find(
+                {"college_id": {"$in": [user.college_id for _, user in valid]}},
+                {"_id": 0, "college_id": 1}
+            )
+        }
+        to_create = []
+        for line, user in valid:
+            if user.college_id in existing:
+                self._error(line, user.college_id, ["College ID already exists"])
+            else:
+                to_create.append((line, user))
+        if not to_create:
+            return
+
+        hashes = await self.hash_many([user.password for _, user in to_create])
+        docs = []
+        for (_, user), password_hash in zip(to_create, hashes):
+            user_dict = user.model_dump()
+            user_dict.pop("password")
+            docs.append(self.user_model(**user_dict, password_hash=password_hash).model_dump())
+
+        try:
+            await self.db.users.insert_many(docs, ordered=False)
+            self.inserted += len(docs)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            self.inserted += len(docs) - len(write_errors)
+            for err in write_errors:
+                line, user = to_create[err["index"]]
+                if err.get("code") == DUPLICATE_KEY_ERROR:
+                    self._error(line, user.college_id, ["College ID already exists"])
+                else:
+                    self._error(line, user.college_id, [err.get("errmsg", "Write failed")])
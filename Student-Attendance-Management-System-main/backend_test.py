@@ -261,7 +261,36 @@ class AttendanceSystemTester:
                 data=attendance_data,
                 token=self.faculty_token
             )
-        
+            
+            # Test bulk marking; the student marked above comes back as a duplicate
+            bulk_data = {
+                "records": [
+                    {"student_id": "student-1", "status": "present"},
+                    {"student_id": "student-2", "status": "absent"}
+                ]
+            }
+            success, bulk_response = self.run_test(
+                "Mark Session Attendance (Bulk)",
+                "POST",
+                f"faculty/sessions/{session_response.get('id')}/attendance",
+                200,
+                data=bulk_data,
+                token=self.faculty_token
+            )
+            if success:
+                print(f"   Inserted: {bulk_response.get('inserted')}, Duplicate: {bulk_response.get('duplicate')}, Invalid: {bulk_response.get('invalid')}")
+
+            # Test the attendance sheet with the marks just made
+            success, sheet_response = self.run_test(
+                "Get Session Sheet",
+                "GET",
+                f"faculty/sessions/{session_response.get('id')}/sheet",
+                200,
+                token=self.faculty_token
+            )
+            if success:
+                print(f"   Students: {len(sheet_response.get('students', []))}, Marked: {sheet_response.get('marked')}")
+
         # Test getting attendance records
         self.run_test(
             "Get Subject Attendance",
@@ -314,6 +343,15 @@ class AttendanceSystemTester:
             200,
             token=self.student_token
         )
+        
+        # Test combined dashboard
+        self.run_test(
+            "Get Student Dashboard",
+            "GET",
+            "student/dashboard",
+            200,
+            token=self.student_token
+        )
 
     def test_authorization(self):
         """Test role-based access control"""
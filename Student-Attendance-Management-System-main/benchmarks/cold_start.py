@@ -0,0 +1,101 @@
+"""Cold-start time of the API server.
+
+Starts `uvicorn server:app` from the backend directory and measures, from the
+moment the process is spawned:
+
+    live         first 200 from /api/health/live (the worker is accepting requests)
+    ready        first 200 from /api/health/ready (pool and indexes warmed)
+    first_login  first successful POST /api/auth/login, which hits Mongo and bcrypt
+
+The server is stopped after each run. It needs a reachable MongoDB, configured
+through backend/.env or the environment, e.g. a seeded local mongod.
+
+Usage:
+    python benchmarks/cold_start.py --runs 5 [--workers 4] [--output results/cold_start.json]
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+POLL_INTERVAL = 0.01
+
+
+def wait_for(client: httpx.Client, process: subprocess.Popen, started: float, deadline: float,
+             method: str, url: str, **kwargs) -> float:
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}; is MongoDB reachable?")
+        try:
+            if client.request(method, url, **kwargs).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"{method} {url} did not succeed in time")
+
+
+def run_once(args) -> dict:
+    command = [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port), "--log-level", "warning"]
+    if args.workers > 1:
+        command += ["--workers", str(args.workers)]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy())
+    deadline = started + args.timeout
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=5) as client:
+            live = wait_for(client, process, started, deadline, "GET", "/api/health/live")
+            ready = wait_for(client, process, started, deadline, "GET", "/api/health/ready")
+            first_login = wait_for(client, process, started, deadline, "POST", "/api/auth/login",
+                                   json={"college_id": args.college_id, "password": args.password})
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"live_ms": live * 1000, "ready_ms": ready * 1000, "first_login_ms": first_login * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--college-id", default="brubk2025")
+    parser.add_argument("--password", default="Leow1012")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for run in range(1, args.runs + 1):
+        result = run_once(args)
+        runs.append(result)
+        print(f"run {run}: live {result['live_ms']:.0f}ms, ready {result['ready_ms']:.0f}ms, "
+              f"first login {result['first_login_ms']:.0f}ms")
+
+    summary = {
+        key: {"median": round(statistics.median(r[key] for r in runs), 1), "max": round(max(r[key] for r in runs), 1)}
+        for key in ("live_ms", "ready_ms", "first_login_ms")
+    }
+    print("\nmedian: " + ", ".join(f"{key} {value['median']}" for key, value in summary.items()))
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({"workers": args.workers, "runs": runs, "summary": summary}, indent=2))
+        print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Asyncio load harness for the attendance API.
+
+Replays role mixes against a running server (backed by a local mongod) and
+reports requests/second and p50/p95/p99 latency per route. Results are saved
+as JSON so runs can be compared with --compare.
+
+Scenarios:
+    morning_marking    faculty create a session and mark the whole class
+    dashboard_refresh  students reloading their dashboard
+    faculty_reports    faculty opening subject reports
+    mixed              all of the above, weighted like a normal morning
+
+The marking scenario writes sessions and attendance, so run it against a
+freshly seeded database rather than real data.
+
+Every virtual user logs in from this machine's IP, which the server's login
+admission limits (LOGIN_IP_PER_MINUTE, LOGIN_IP_BURST). Throttled logins are
+retried after their Retry-After for up to LOGIN_MAX_WAIT seconds, then the
+run aborts. For large --users counts, raise those limits on the server first.
+
+Usage:
+    python benchmarks/load_test.py --scenario mixed --users 50 --duration 60 \\
+        --output results/mixed.json [--compare results/previous.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+SCENARIOS = {
+    "morning_marking": {"mark_session": 1.0},
+    "dashboard_refresh": {"student_dashboard": 1.0},
+    "faculty_reports": {"faculty_report": 1.0},
+    "mixed": {"student_dashboard": 0.7, "faculty_report": 0.2, "mark_session": 0.1},
+}
+
+STUDENT_ACTIONS = {"student_dashboard"}
+LOGIN_MAX_WAIT = 60.0
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, status: int, seconds: float):
+        self.latencies[route].append(seconds * 1000)
+        self.statuses[route][str(status)] += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def timed(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError:
+        response, status = None, 0
+    recorder.record(route, status, time.perf_counter() - started)
+    return response
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, token: str, profile: dict, recorder: Recorder):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.profile = profile
+        self.recorder = recorder
+        self.day = 0
+
+    async def student_dashboard(self):
+        await timed(self.client, self.recorder, "GET /api/student/dashboard", "GET",
+                    "/api/student/dashboard", headers=self.headers)
+
+    async def faculty_report(self):
+        subject = random.choice(self.profile["subjects"])
+        await timed(self.client, self.recorder, "GET /api/faculty/reports/{subject_id}", "GET",
+                    f"/api/faculty/reports/{subject['id']}", headers=self.headers)
+
+    async def mark_session(self):
+        subject = random.choice(self.profile["subjects"])
+        # Spread sessions over past dates so repeated runs stay plausible
+        self.day += 1
+        session_date = (date.today() - timedelta(days=self.day)).isoformat()
+        response = await timed(self.client, self.recorder, "POST /api/faculty/sessions", "POST",
+                               "/api/faculty/sessions", headers=self.headers,
+                               json={"subject_id": subject["id"], "date": session_date})
+        if response is None or response.status_code != 200:
+            return
+        roster = self.profile["rosters"][subject["course_id"]]
+        records = [
+            {"student_id": student_id, "status": "present" if random.random() < 0.85 else "absent"}
+            for student_id in roster
+        ]
+        await timed(self.client, self.recorder, "POST /api/faculty/sessions/{session_id}/attendance", "POST",
+                    f"/api/faculty/sessions/{response.json()['id']}/attendance",
+                    headers=self.headers, json={"records": records})
+
+    async def run(self, actions: dict, deadline: float):
+        names = list(actions)
+        weights = [actions[name] for name in names]
+        while time.perf_counter() < deadline:
+            await getattr(self, random.choices(names, weights)[0])()
+
+
+async def login(client: httpx.AsyncClient, college_id: str, password: str):
+    waited = 0.0
+    while True:
+        response = await client.post("/api/auth/login", json={"college_id": college_id, "password": password})
+        if response.status_code != 429:
+            break
+        retry_after = float(response.headers.get("retry-after", "1"))
+        if waited + retry_after > LOGIN_MAX_WAIT:
+            raise SystemExit(
+                f"Login for {college_id} was still rate limited after {waited:.0f}s; raise LOGIN_IP_PER_MINUTE "
+                "and LOGIN_IP_BURST on the server for load runs"
+            )
+        await asyncio.sleep(retry_after)
+        waited += retry_after
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+
+async def prepare_users(client: httpx.AsyncClient, args, actions: dict):
+    """Log in a sample of students and faculty and load what their actions need"""
+    admin = await login(client, args.admin_id, args.admin_password)
+    if not admin:
+        raise SystemExit("Admin login failed; check --admin-id/--admin-password")
+    admin_headers = {"Authorization": f"Bearer {admin['token']}"}
+
+    users = []
+    async with client.stream("GET", "/api/admin/users", params={"format": "ndjson"}, headers=admin_headers) as response:
+        async for line in response.aiter_lines():
+            if line:
+                users.append(json.loads(line))
+    subjects = (await client.get("/api/admin/subjects", headers=admin_headers)).json()
+
+    needs_students = any(action in STUDENT_ACTIONS for action in actions)
+    needs_faculty = any(action not in STUDENT_ACTIONS for action in actions)
+    students = [u for u in users if u["role"] == "student"]
+    faculty = [u for u in users if u["role"] == "faculty" and any(s.get("faculty_id") == u["id"] for s in subjects)]
+
+    rosters = defaultdict(list)
+    for student in students:
+        rosters[student.get("course_id")].append(student["id"])
+
+    profiles = []
+    if needs_students:
+        for student in random.sample(students, min(len(students), args.users)):
+            profiles.append(({"role": "student"}, student["college_id"], args.student_password))
+    if needs_faculty:
+        for member in random.sample(faculty, min(len(faculty), max(1, args.users // 10))):
+            profiles.append(({
+                "role": "faculty",
+                "subjects": [s for s in subjects if s.get("faculty_id") == member["id"]],
+                "rosters": rosters,
+            }, member["college_id"], args.faculty_password))
+
+    # Logins are bcrypt-bound, so keep setup from flooding the server
+    semaphore = asyncio.Semaphore(8)
+
+    async def login_profile(profile, college_id, password):
+        async with semaphore:
+            result = await login(client, college_id, password)
+        return (profile, result["token"]) if result else None
+
+    logged_in = [p for p in await asyncio.gather(*(login_profile(*p) for p in profiles)) if p]
+    if not logged_in:
+        raise SystemExit("No users could log in; check the --student-password/--faculty-password flags")
+    if len(logged_in) < len(profiles):
+        print(f"Warning: {len(profiles) - len(logged_in)} of {len(profiles)} users could not log in and are left out")
+    return logged_in
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        statuses = dict(recorder.statuses[route])
+        errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": statuses,
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "max_ms": round(max(latencies), 2),
+        }
+    total = sum(r["requests"] for r in routes.values())
+    return {"elapsed_seconds": round(elapsed, 2), "total_requests": total, "rps": round(total / elapsed, 2), "routes": routes}
+
+
+def print_summary(summary: dict, previous: dict = None):
+    print(f"\n{'route':<55} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in summary["routes"].items():
+        line = (f"{route:<55} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+                f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+        before = (previous or {}).get("routes", {}).get(route)
+        if before:
+            line += f"   p95 {stats['p95_ms'] - before['p95_ms']:+.2f}ms, rps {stats['rps'] - before['rps']:+.2f}"
+        print(line)
+    print(f"\nTotal: {summary['total_requests']} requests in {summary['elapsed_seconds']}s ({summary['rps']} req/s)")
+
+
+async def main_async(args) -> dict:
+    random.seed(args.seed)
+    actions = SCENARIOS[args.scenario]
+    limits = httpx.Limits(max_connections=args.users + 10, max_keepalive_connections=args.users + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        logged_in = await prepare_users(client, args, actions)
+        recorder = Recorder()
+        vusers = []
+        for profile, token in logged_in:
+            user = VirtualUser(client, token, profile, recorder)
+            if profile["role"] == "student":
+                user_actions = {a: w for a, w in actions.items() if a in STUDENT_ACTIONS}
+            else:
+                user_actions = {a: w for a, w in actions.items() if a not in STUDENT_ACTIONS}
+            if user_actions:
+                vusers.append((user, user_actions))
+
+        print(f"Running {args.scenario} with {len(vusers)} virtual users for {args.duration}s against {args.base_url}")
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(user.run(user_actions, deadline) for user, user_actions in vusers))
+        return summarize(recorder, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the attendance API")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--users", type=int, default=50, help="student virtual users; faculty are a tenth of this")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--admin-id", default="brubk2025")
+    parser.add_argument("--admin-password", default="Leow1012")
+    parser.add_argument("--faculty-password", default="faculty123")
+    parser.add_argument("--student-password", default="student123")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    summary = asyncio.run(main_async(args))
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_summary(summary, previous)
+
+    if args.output:
+        result = {
+            "scenario": args.scenario,
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration": args.duration,
+            "started_at": started_at,
+            **summary,
+        }
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2))
+        print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Latency of other requests during a burst of logins, before and after
+moving bcrypt onto the password pool.
+
+A probe coroutine stands in for a cheap endpoint such as /api/auth/me: it
+sleeps for a fixed interval and records how late it wakes up. While it runs,
+a burst of concurrent password verifications is executed either inline on
+the event loop (the old behaviour) or through PasswordPool.
+
+Usage:
+    python benchmarks/login_burst.py [--logins 50] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from passlib.context import CryptContext  # noqa: E402
+
+from password_pool import PasswordPool  # noqa: E402
+
+PROBE_INTERVAL = 0.01
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(stop: asyncio.Event, delays: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+async def run_burst(mode: str, pwd_context: CryptContext, password_hash: str, logins: int, concurrency: int) -> dict:
+    pool = PasswordPool(pwd_context, concurrency=concurrency)
+
+    async def login():
+        if mode == "inline":
+            return pwd_context.verify("student123", password_hash)
+        return await pool.verify("student123", password_hash)
+
+    stop = asyncio.Event()
+    delays = []
+    probe_task = asyncio.create_task(probe(stop, delays))
+    await asyncio.sleep(PROBE_INTERVAL * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    pool.shutdown()
+
+    return {
+        "mode": mode,
+        "logins": logins,
+        "burst_seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+        "probe_samples": len(delays),
+        "probe_p50_ms": round(statistics.median(delays), 2),
+        "probe_p95_ms": round(percentile(delays, 95), 2),
+        "probe_max_ms": round(max(delays), 2),
+        "max_queue_depth": pool.max_queue_depth,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    password_hash = pwd_context.hash("student123")
+
+    print(f"{'mode':<8} {'burst s':>8} {'logins/s':>9} {'probe p50':>10} {'probe p95':>10} {'probe max':>10}")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run_burst(mode, pwd_context, password_hash, args.logins, args.concurrency))
+        print(
+            f"{result['mode']:<8} {result['burst_seconds']:>8} {result['logins_per_second']:>9} "
+            f"{result['probe_p50_ms']:>8}ms {result['probe_p95_ms']:>8}ms {result['probe_max_ms']:>8}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
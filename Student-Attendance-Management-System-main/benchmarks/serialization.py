@@ -0,0 +1,100 @@
+"""Response serialization cost per 10k records.
+
+List paths render 10k attendance-record documents (the shape returned by
+`GET /api/faculty/attendance/{subject_id}`):
+
+    default       jsonable_encoder + JSONResponse (json.dumps), FastAPI's path for a returned list
+    fast_default  jsonable_encoder + FastJSONResponse, the app's default response class
+    fast          FastJSONResponse on the documents directly, what list_documents returns
+
+Model paths serialize 10k AttendanceRecord objects one response at a time,
+as `POST /api/faculty/attendance` does:
+
+    response_model  FastAPI's serialize_response: re-validation against the model, then encoding
+    model_response  model_dump() + orjson, skipping the re-validation
+
+Usage:
+    python benchmarks/serialization.py [--records 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from fast_json import FastJSONResponse, model_response  # noqa: E402
+from server import AttendanceRecord  # noqa: E402
+
+
+def make_records(count: int) -> list:
+    session_ids = [str(uuid.uuid4()) for _ in range(40)]
+    subject_id = str(uuid.uuid4())
+    faculty_id = str(uuid.uuid4())
+    created_at = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "session_id": session_ids[i % len(session_ids)],
+            "student_id": str(uuid.uuid4()),
+            "subject_id": subject_id,
+            "status": "present" if i % 5 else "absent",
+            "marked_by": faculty_id,
+            "created_at": created_at,
+        }
+        for i in range(count)
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_records(args.records)
+    models = [AttendanceRecord(**doc) for doc in docs]
+    field = create_response_field(name="response", type_=AttendanceRecord)
+    scale = 10000 / args.records
+
+    async def response_model_path():
+        for model in models:
+            JSONResponse(await serialize_response(field=field, response_content=model, is_coroutine=True))
+
+    cases = {
+        "default": lambda: JSONResponse(jsonable_encoder(docs)),
+        "fast_default": lambda: FastJSONResponse(jsonable_encoder(docs)),
+        "fast": lambda: FastJSONResponse(docs),
+        "response_model": lambda: asyncio.run(response_model_path()),
+        "model_response": lambda: [model_response(model) for model in models],
+    }
+
+    assert JSONResponse(jsonable_encoder(docs)).body.decode() == FastJSONResponse(docs).body.decode()
+
+    results = {name: timed(func, args.repeat) * 1000 * scale for name, func in cases.items()}
+    print(f"{'path':<16}{'ms / 10k records':>18}{'vs. baseline':>14}")
+    for name, ms in results.items():
+        baseline = results["default"] if name.startswith("fast") or name == "default" else results["response_model"]
+        print(f"{name:<16}{ms:>18.1f}{baseline / ms:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
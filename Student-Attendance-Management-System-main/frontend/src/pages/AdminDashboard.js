@@ -109,6 +109,44 @@ function Dashboard() {
           </CardContent>
         </Card>
       </div>
+
+      <h2 className="text-xl font-semibold text-gray-900 mt-10 mb-4">Departments</h2>
+      <div className="table-container">
+        <table>
+          <thead>
+            <tr>
+              <th>Department</th>
+              <th>Course</th>
+              <th>Students</th>
+              <th>Subjects</th>
+              <th>Classes</th>
+              <th>At Risk</th>
+            </tr>
+          </thead>
+          <tbody>
+            {(stats.departments || []).map((dept) => [
+              <tr key={dept.department_id} className="font-semibold" data-testid={`overview-dept-${dept.code}`}>
+                <td><span className="badge badge-info">{dept.code}</span> {dept.name}</td>
+                <td>{dept.courses.length} courses</td>
+                <td>{dept.students}</td>
+                <td>{dept.subjects}</td>
+                <td>{dept.sessions}</td>
+                <td className={dept.at_risk_students > 0 ? 'text-red-600' : ''}>{dept.at_risk_students}</td>
+              </tr>,
+              ...dept.courses.map((course) => (
+                <tr key={course.course_id} data-testid={`overview-course-${course.code}`}>
+                  <td></td>
+                  <td>{course.name} <span className="text-gray-500">({course.threshold}%)</span></td>
+                  <td>{course.students}</td>
+                  <td>{course.subjects}</td>
+                  <td>{course.sessions}</td>
+                  <td className={course.at_risk_students > 0 ? 'text-red-600' : ''}>{course.at_risk_students}</td>
+                </tr>
+              )),
+            ])}
+          </tbody>
+        </table>
+      </div>
     </div>
   );
 }
@@ -478,6 +516,7 @@ function Users() {
   const [role, setRole] = useState('student');
   const [departmentId, setDepartmentId] = useState('');
   const [courseId, setCourseId] = useState('');
+  const [importing, setImporting] = useState(false);
 
   useEffect(() => {
     loadUsers();
@@ -485,6 +524,31 @@ function Users() {
     loadCourses();
   }, []);
 
+  const handleImport = async (event) => {
+    const file = event.target.files[0];
+    event.target.value = '';
+    if (!file) return;
+
+    setImporting(true);
+    try {
+      const response = await axiosInstance.post('/admin/users/import', file, {
+        headers: { 'Content-Type': 'text/csv' },
+      });
+      const { inserted, failed, errors } = response.data;
+      if (failed > 0) {
+        const first = errors[0];
+        toast.error(`Imported ${inserted} users, ${failed} rows failed (line ${first.line}: ${first.errors.join('; ')})`);
+      } else {
+        toast.success(`Imported ${inserted} users`);
+      }
+      loadUsers();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Failed to import users');
+    } finally {
+      setImporting(false);
+    }
+  };
+
   const loadUsers = async () => {
     try {
       const response = await axiosInstance.get('/admin/users');
@@ -558,77 +622,83 @@ function Users() {
     <div>
       <div className="flex justify-between items-center mb-8">
         <h1 className="text-3xl font-bold text-gray-900" data-testid="users-title">Users Management</h1>
-        <Dialog open={open} onOpenChange={setOpen}>
-          <DialogTrigger asChild>
-            <Button data-testid="add-user-button">Add User</Button>
-          </DialogTrigger>
-          <DialogContent className="max-w-md max-h-[90vh] overflow-y-auto">
-            <DialogHeader>
-              <DialogTitle>Create User</DialogTitle>
-              <DialogDescription>Add a new admin, faculty or student to the system</DialogDescription>
-            </DialogHeader>
-            <div className="space-y-4 mt-4">
-              <div>
-                <Label>College ID</Label>
-                <Input value={collegeId} onChange={(e) => setCollegeId(e.target.value)} placeholder="e.g., STU2050" data-testid="user-college-id-input" />
-              </div>
-              <div>
-                <Label>Full Name</Label>
-                <Input value={name} onChange={(e) => setName(e.target.value)} placeholder="e.g., John Doe" data-testid="user-name-input" />
-              </div>
-              <div>
-                <Label>Email</Label>
-                <Input type="email" value={email} onChange={(e) => setEmail(e.target.value)} placeholder="e.g., john@college.edu" data-testid="user-email-input" />
-              </div>
-              <div>
-                <Label>Password</Label>
-                <Input type="password" value={password} onChange={(e) => setPassword(e.target.value)} placeholder="Enter password" data-testid="user-password-input" />
-              </div>
-              <div>
-                <Label>Role</Label>
-                <Select value={role} onValueChange={setRole}>
-                  <SelectTrigger data-testid="user-role-select">
-                    <SelectValue />
-                  </SelectTrigger>
-                  <SelectContent>
-                    <SelectItem value="student">Student</SelectItem>
-                    <SelectItem value="faculty">Faculty</SelectItem>
-                    <SelectItem value="admin">Admin</SelectItem>
-                  </SelectContent>
-                </Select>
-              </div>
-              <div>
-                <Label>Department</Label>
-                <Select value={departmentId} onValueChange={setDepartmentId}>
-                  <SelectTrigger data-testid="user-dept-select">
-                    <SelectValue placeholder="Select department" />
-                  </SelectTrigger>
-                  <SelectContent>
-                    {departments.map((dept) => (
-                      <SelectItem key={dept.id} value={dept.id}>{dept.name}</SelectItem>
-                    ))}
-                  </SelectContent>
-                </Select>
-              </div>
-              {role === 'student' && (
+        <div className="flex gap-3">
+          <label className="btn-secondary cursor-pointer" data-testid="import-users-button">
+            {importing ? 'Importing...' : 'Import CSV'}
+            <input type="file" accept=".csv,text/csv" className="hidden" onChange={handleImport} disabled={importing} />
+          </label>
+          <Dialog open={open} onOpenChange={setOpen}>
+            <DialogTrigger asChild>
+              <Button data-testid="add-user-button">Add User</Button>
+            </DialogTrigger>
+            <DialogContent className="max-w-md max-h-[90vh] overflow-y-auto">
+              <DialogHeader>
+                <DialogTitle>Create User</DialogTitle>
+                <DialogDescription>Add a new admin, faculty or student to the system</DialogDescription>
+              </DialogHeader>
+              <div className="space-y-4 mt-4">
                 <div>
-                  <Label>Course</Label>
-                  <Select value={courseId} onValueChange={setCourseId}>
-                    <SelectTrigger data-testid="user-course-select">
-                      <SelectValue placeholder="Select course" />
+                  <Label>College ID</Label>
+                  <Input value={collegeId} onChange={(e) => setCollegeId(e.target.value)} placeholder="e.g., STU2050" data-testid="user-college-id-input" />
+                </div>
+                <div>
+                  <Label>Full Name</Label>
+                  <Input value={name} onChange={(e) => setName(e.target.value)} placeholder="e.g., John Doe" data-testid="user-name-input" />
+                </div>
+                <div>
+                  <Label>Email</Label>
+                  <Input type="email" value={email} onChange={(e) => setEmail(e.target.value)} placeholder="e.g., john@college.edu" data-testid="user-email-input" />
+                </div>
+                <div>
+                  <Label>Password</Label>
+                  <Input type="password" value={password} onChange={(e) => setPassword(e.target.value)} placeholder="Enter password" data-testid="user-password-input" />
+                </div>
+                <div>
+                  <Label>Role</Label>
+                  <Select value={role} onValueChange={setRole}>
+                    <SelectTrigger data-testid="user-role-select">
+                      <SelectValue />
+                    </SelectTrigger>
+                    <SelectContent>
+                      <SelectItem value="student">Student</SelectItem>
+                      <SelectItem value="faculty">Faculty</SelectItem>
+                      <SelectItem value="admin">Admin</SelectItem>
+                    </SelectContent>
+                  </Select>
+                </div>
+                <div>
+                  <Label>Department</Label>
+                  <Select value={departmentId} onValueChange={setDepartmentId}>
+                    <SelectTrigger data-testid="user-dept-select">
+                      <SelectValue placeholder="Select department" />
                     </SelectTrigger>
                     <SelectContent>
-                      {courses.map((course) => (
-                        <SelectItem key={course.id} value={course.id}>{course.name}</SelectItem>
+                      {departments.map((dept) => (
+                        <SelectItem key={dept.id} value={dept.id}>{dept.name}</SelectItem>
                       ))}
                     </SelectContent>
                   </Select>
                 </div>
-              )}
-              <Button onClick={handleCreate} className="w-full" data-testid="create-user-button">Create User</Button>
-            </div>
-          </DialogContent>
-        </Dialog>
+                {role === 'student' && (
+                  <div>
+                    <Label>Course</Label>
+                    <Select value={courseId} onValueChange={setCourseId}>
+                      <SelectTrigger data-testid="user-course-select">
+                        <SelectValue placeholder="Select course" />
+                      </SelectTrigger>
+                      <SelectContent>
+                        {courses.map((course) => (
+                          <SelectItem key={course.id} value={course.id}>{course.name}</SelectItem>
+                        ))}
+                      </SelectContent>
+                    </Select>
+                  </div>
+                )}
+                <Button onClick={handleCreate} className="w-full" data-testid="create-user-button">Create User</Button>
+              </div>
+            </DialogContent>
+          </Dialog>
+        </div>
       </div>
 
       <div className="table-container">
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Routes, Route, Link, useLocation } from 'react-router-dom';
-import { axiosInstance } from '../App';
+import { API, axiosInstance } from '../App';
 import { toast } from 'sonner';
 import { LayoutDashboard, ClipboardCheck, BarChart3, Mail, LogOut } from 'lucide-react';
 import { Button } from '../components/ui/button';
@@ -125,10 +125,10 @@ function Dashboard() {
 
 function MarkAttendance() {
   const [subjects, setSubjects] = useState([]);
+  const [sessions, setSessions] = useState([]);
   const [selectedSubject, setSelectedSubject] = useState('');
-  const [students, setStudents] = useState([]);
   const [date, setDate] = useState(new Date().toISOString().split('T')[0]);
-  const [sessionId, setSessionId] = useState('');
+  const [sheet, setSheet] = useState(null);
   const [attendance, setAttendance] = useState({});
   const [loading, setLoading] = useState(false);
 
@@ -138,33 +138,29 @@ function MarkAttendance() {
 
   const loadSubjects = async () => {
     try {
-      const response = await axiosInstance.get('/admin/subjects');
-      const mySubjects = response.data.filter(s => s.faculty_id);
-      setSubjects(mySubjects);
+      const [subjectsRes, sessionsRes] = await Promise.all([
+        axiosInstance.get('/admin/subjects'),
+        axiosInstance.get('/faculty/sessions')
+      ]);
+      setSubjects(subjectsRes.data.filter(s => s.faculty_id));
+      setSessions(sessionsRes.data);
     } catch (error) {
       toast.error('Failed to load subjects');
     }
   };
 
-  const loadStudents = async (subjectId) => {
+  // Session, subject, course, roster and existing marks in one call
+  const loadSheet = async (sessionId) => {
     try {
-      const subject = subjects.find(s => s.id === subjectId);
-      if (!subject) return;
+      const response = await axiosInstance.get(`/faculty/sessions/${sessionId}/sheet`);
+      setSheet(response.data);
 
-      const courseRes = await axiosInstance.get('/admin/courses');
-      const course = courseRes.data.find(c => c.id === subject.course_id);
-      
-      if (course) {
-        const studentsRes = await axiosInstance.get(`/courses/${course.id}/students`);
-        setStudents(studentsRes.data);
-        
-        // Initialize attendance as present for all
-        const initialAttendance = {};
-        studentsRes.data.forEach(student => {
-          initialAttendance[student.id] = 'present';
-        });
-        setAttendance(initialAttendance);
-      }
+      // Unmarked students start as present
+      const initialAttendance = {};
+      response.data.students.forEach(student => {
+        initialAttendance[student.id] = student.status || 'present';
+      });
+      setAttendance(initialAttendance);
     } catch (error) {
       toast.error('Failed to load students');
     }
@@ -172,52 +168,62 @@ function MarkAttendance() {
 
   const handleSubjectChange = (subjectId) => {
     setSelectedSubject(subjectId);
-    loadStudents(subjectId);
+    setSheet(null);
+  };
+
+  const handleDateChange = (value) => {
+    setDate(value);
+    setSheet(null);
   };
 
-  const createSession = async () => {
+  const openSession = async () => {
     if (!selectedSubject || !date) {
       toast.error('Please select subject and date');
       return;
     }
 
     try {
+      // Reopen this subject's session for the date if it already exists
+      const found = await axiosInstance.get('/faculty/sessions', {
+        params: { subject_id: selectedSubject, date: date, limit: 1 }
+      });
+      if (found.data.length > 0) {
+        await loadSheet(found.data[0].id);
+        return;
+      }
+
       const response = await axiosInstance.post('/faculty/sessions', {
         subject_id: selectedSubject,
         date: date
       });
-      setSessionId(response.data.id);
+      setSessions(prev => [...prev, response.data]);
       toast.success('Session created successfully');
+      await loadSheet(response.data.id);
     } catch (error) {
       toast.error('Failed to create session');
     }
   };
 
-  const handleSubmitAttendance = async () => {
-    if (!sessionId) {
-      await createSession();
-      return;
-    }
+  const unmarked = sheet ? sheet.students.filter(student => !student.status) : [];
 
+  const handleSubmitAttendance = async () => {
     setLoading(true);
     try {
-      const promises = students.map(student => 
-        axiosInstance.post('/faculty/attendance', {
-          session_id: sessionId,
+      const response = await axiosInstance.post(`/faculty/sessions/${sheet.session.id}/attendance`, {
+        records: unmarked.map(student => ({
           student_id: student.id,
-          subject_id: selectedSubject,
           status: attendance[student.id]
-        })
-      );
+        }))
+      });
 
-      await Promise.all(promises);
-      toast.success('Attendance marked successfully');
-      
-      // Reset
-      setSelectedSubject('');
-      setStudents([]);
-      setSessionId('');
-      setAttendance({});
+      const { inserted, duplicate, invalid } = response.data;
+      if (duplicate || invalid) {
+        toast.warning(`Marked ${inserted} students (${duplicate} already marked, ${invalid} invalid)`);
+      } else {
+        toast.success('Attendance marked successfully');
+      }
+
+      await loadSheet(sheet.session.id);
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Failed to mark attendance');
     } finally {
@@ -238,7 +244,7 @@ function MarkAttendance() {
 
       <Card className="mb-6">
         <CardContent className="pt-6">
-          <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+          <div className="grid grid-cols-1 md:grid-cols-3 gap-4 items-end">
             <div>
               <Label>Select Subject</Label>
               <Select value={selectedSubject} onValueChange={handleSubjectChange}>
@@ -254,38 +260,51 @@ function MarkAttendance() {
             </div>
             <div>
               <Label>Date</Label>
-              <Input type="date" value={date} onChange={(e) => setDate(e.target.value)} data-testid="date-input" />
+              <Input type="date" value={date} onChange={(e) => handleDateChange(e.target.value)} data-testid="date-input" />
             </div>
+            <Button onClick={openSession} disabled={!selectedSubject} data-testid="open-session-button">
+              Open Session
+            </Button>
           </div>
         </CardContent>
       </Card>
 
-      {students.length > 0 && (
+      {sheet && (
         <Card>
           <CardHeader className="flex flex-row items-center justify-between">
-            <CardTitle>Students List</CardTitle>
-            <Button onClick={handleSubmitAttendance} disabled={loading} data-testid="submit-attendance-button">
+            <div>
+              <CardTitle>{sheet.subject.name} ({sheet.subject.code})</CardTitle>
+              <p className="text-sm text-gray-500 mt-1">
+                {sheet.course?.name} · {sheet.session.date} · {sheet.marked} of {sheet.students.length} marked
+              </p>
+            </div>
+            <Button onClick={handleSubmitAttendance} disabled={loading || unmarked.length === 0} data-testid="submit-attendance-button">
               {loading ? 'Submitting...' : 'Submit Attendance'}
             </Button>
           </CardHeader>
           <CardContent>
-            <div className="space-y-2">
-              {students.map((student) => (
-                <div key={student.id} className="flex items-center justify-between p-4 bg-gray-50 rounded-lg" data-testid={`student-${student.college_id}`}>
-                  <div>
-                    <p className="font-medium">{student.name}</p>
-                    <p className="text-sm text-gray-500">{student.college_id}</p>
+            {sheet.students.length === 0 ? (
+              <p className="text-gray-500 text-center py-8">No students enrolled in this course</p>
+            ) : (
+              <div className="space-y-2">
+                {sheet.students.map((student) => (
+                  <div key={student.id} className="flex items-center justify-between p-4 bg-gray-50 rounded-lg" data-testid={`student-${student.college_id}`}>
+                    <div>
+                      <p className="font-medium">{student.name}</p>
+                      <p className="text-sm text-gray-500">{student.college_id}</p>
+                    </div>
+                    <button
+                      onClick={() => toggleAttendance(student.id)}
+                      disabled={Boolean(student.status)}
+                      className={`px-4 py-2 rounded-lg font-medium ${attendance[student.id] === 'present' ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'} ${student.status ? 'opacity-60 cursor-not-allowed' : ''}`}
+                      data-testid={`toggle-${student.college_id}`}
+                    >
+                      {attendance[student.id] === 'present' ? 'Present' : 'Absent'}{student.status ? ' (marked)' : ''}
+                    </button>
                   </div>
-                  <button
-                    onClick={() => toggleAttendance(student.id)}
-                    className={`px-4 py-2 rounded-lg font-medium ${attendance[student.id] === 'present' ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'}`}
-                    data-testid={`toggle-${student.college_id}`}
-                  >
-                    {attendance[student.id] === 'present' ? 'Present' : 'Absent'}
-                  </button>
-                </div>
-              ))}
-            </div>
+                ))}
+              </div>
+            )}
           </CardContent>
         </Card>
       )}
@@ -293,9 +312,29 @@ function MarkAttendance() {
   );
 }
 
+// Applies live session/mark deltas to a loaded report without refetching it
+function applyReportDelta(report, newSessions, presentDeltas) {
+  if (!report) return report;
+  const totalClasses = report.total_classes + newSessions;
+  const students = report.students.map((student) => {
+    const attended = student.attended + (presentDeltas[student.student_id] || 0);
+    const percentage = totalClasses > 0 ? (attended / totalClasses) * 100 : 0;
+    return {
+      ...student,
+      total_classes: totalClasses,
+      attended,
+      percentage: Math.round(percentage * 100) / 100,
+      eligible: percentage >= report.threshold,
+    };
+  });
+  return { ...report, total_classes: totalClasses, students };
+}
+
 function Reports() {
   const [subjects, setSubjects] = useState([]);
   const [selectedSubject, setSelectedSubject] = useState('');
+  const [terms, setTerms] = useState([]);
+  const [term, setTerm] = useState('current');
   const [report, setReport] = useState(null);
   const [loading, setLoading] = useState(false);
 
@@ -305,18 +344,23 @@ function Reports() {
 
   const loadSubjects = async () => {
     try {
-      const response = await axiosInstance.get('/admin/subjects');
-      const mySubjects = response.data.filter(s => s.faculty_id);
-      setSubjects(mySubjects);
+      const [subjectsRes, termsRes] = await Promise.all([
+        axiosInstance.get('/admin/subjects'),
+        axiosInstance.get('/archive/terms')
+      ]);
+      setSubjects(subjectsRes.data.filter(s => s.faculty_id));
+      setTerms(termsRes.data.filter(t => t.status === 'archived'));
     } catch (error) {
       toast.error('Failed to load subjects');
     }
   };
 
-  const loadReport = async (subjectId) => {
+  // Archived terms are served from the term archive and receive no live updates
+  const loadReport = async (subjectId, termName = term) => {
     setLoading(true);
     try {
-      const response = await axiosInstance.get(`/faculty/reports/${subjectId}`);
+      const params = termName === 'current' ? {} : { term: termName };
+      const response = await axiosInstance.get(`/faculty/reports/${subjectId}`, { params });
       setReport(response.data);
     } catch (error) {
       toast.error('Failed to load report');
@@ -330,6 +374,70 @@ function Reports() {
     loadReport(subjectId);
   };
 
+  const handleTermChange = (termName) => {
+    setTerm(termName);
+    if (selectedSubject) loadReport(selectedSubject, termName);
+  };
+
+  useEffect(() => {
+    if (!selectedSubject || term !== 'current') return undefined;
+
+    let source = null;
+    let closed = false;
+
+    const listen = () => {
+      source.addEventListener('session.created', () => {
+        setReport((prev) => applyReportDelta(prev, 1, {}));
+      });
+      source.addEventListener('attendance.marked', (event) => {
+        const deltas = {};
+        JSON.parse(event.data).records.forEach((record) => {
+          if (record.status === 'present') {
+            deltas[record.student_id] = (deltas[record.student_id] || 0) + 1;
+          }
+        });
+        setReport((prev) => applyReportDelta(prev, 0, deltas));
+      });
+      source.addEventListener('attendance.updated', (event) => {
+        const data = JSON.parse(event.data);
+        if (!data.old_status) {
+          loadReport(selectedSubject);
+          return;
+        }
+        const delta = (data.status === 'present' ? 1 : 0) - (data.old_status === 'present' ? 1 : 0);
+        setReport((prev) => applyReportDelta(prev, 0, { [data.student_id]: delta }));
+      });
+      source.addEventListener('resync', () => loadReport(selectedSubject));
+    };
+
+    // The URL carries a short-lived token scoped to this stream, never the login token
+    const connect = async (reconnect) => {
+      let token;
+      try {
+        const response = await axiosInstance.post(`/live/subjects/${selectedSubject}/token`);
+        token = response.data.token;
+      } catch (error) {
+        return;
+      }
+      if (closed) return;
+      if (reconnect) loadReport(selectedSubject);
+      source = new EventSource(`${API}/live/subjects/${selectedSubject}?token=${encodeURIComponent(token)}`);
+      listen();
+      source.onerror = () => {
+        // EventSource gives up once its own retry is refused, e.g. with an expired token
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          setTimeout(() => connect(true), 1000);
+        }
+      };
+    };
+
+    connect(false);
+    return () => {
+      closed = true;
+      if (source) source.close();
+    };
+  }, [selectedSubject, term]);
+
   const handleSendAlerts = async () => {
     if (!selectedSubject) return;
 
@@ -345,7 +453,7 @@ function Reports() {
     <div>
       <div className="flex justify-between items-center mb-8">
         <h1 className="text-3xl font-bold text-gray-900" data-testid="reports-title">Attendance Reports</h1>
-        {report && (
+        {report && term === 'current' && (
           <Button onClick={handleSendAlerts} data-testid="send-alerts-button">
             <Mail className="w-4 h-4 mr-2" />
             Send Low Attendance Alerts
@@ -355,17 +463,37 @@ function Reports() {
 
       <Card className="mb-6">
         <CardContent className="pt-6">
-          <Label>Select Subject</Label>
-          <Select value={selectedSubject} onValueChange={handleSubjectChange}>
-            <SelectTrigger data-testid="report-subject-select">
-              <SelectValue placeholder="Choose a subject" />
-            </SelectTrigger>
-            <SelectContent>
-              {subjects.map((subject) => (
-                <SelectItem key={subject.id} value={subject.id}>{subject.name} ({subject.code})</SelectItem>
-              ))}
-            </SelectContent>
-          </Select>
+          <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+            <div>
+              <Label>Select Subject</Label>
+              <Select value={selectedSubject} onValueChange={handleSubjectChange}>
+                <SelectTrigger data-testid="report-subject-select">
+                  <SelectValue placeholder="Choose a subject" />
+                </SelectTrigger>
+                <SelectContent>
+                  {subjects.map((subject) => (
+                    <SelectItem key={subject.id} value={subject.id}>{subject.name} ({subject.code})</SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+            </div>
+            {terms.length > 0 && (
+              <div>
+                <Label>Term</Label>
+                <Select value={term} onValueChange={handleTermChange}>
+                  <SelectTrigger data-testid="report-term-select">
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value="current">Current term</SelectItem>
+                    {terms.map((t) => (
+                      <SelectItem key={t.term} value={t.term}>{t.term} ({t.start} - {t.end})</SelectItem>
+                    ))}
+                  </SelectContent>
+                </Select>
+              </div>
+            )}
+          </div>
         </CardContent>
       </Card>
 
@@ -398,7 +526,7 @@ function Reports() {
                       <td>{student.total_classes}</td>
                       <td>{student.attended}</td>
                       <td>
-                        <span className={`font-bold ${student.percentage >= 75 ? 'text-green-600' : 'text-red-600'}`}>
+                        <span className={`font-bold ${student.eligible ? 'text-green-600' : 'text-red-600'}`}>
                           {student.percentage}%
                         </span>
                       </td>
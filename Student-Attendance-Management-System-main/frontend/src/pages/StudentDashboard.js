@@ -7,6 +7,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card'
 export default function StudentDashboard({ user, onLogout }) {
   const [attendance, setAttendance] = useState([]);
   const [eligibility, setEligibility] = useState(null);
+  const [history, setHistory] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -15,13 +16,14 @@ export default function StudentDashboard({ user, onLogout }) {
 
   const loadData = async () => {
     try {
-      const [attendanceRes, eligibilityRes] = await Promise.all([
-        axiosInstance.get('/student/attendance'),
-        axiosInstance.get('/student/eligibility')
+      const [response, historyRes] = await Promise.all([
+        axiosInstance.get('/student/dashboard'),
+        axiosInstance.get('/student/history')
       ]);
       
-      setAttendance(attendanceRes.data.subjects);
-      setEligibility(eligibilityRes.data);
+      setAttendance(response.data.subjects);
+      setEligibility(response.data.eligibility);
+      setHistory(historyRes.data.terms);
     } catch (error) {
       toast.error('Failed to load data');
     } finally {
@@ -36,6 +38,7 @@ export default function StudentDashboard({ user, onLogout }) {
   const overallPercentage = attendance.length > 0
     ? (attendance.reduce((sum, s) => sum + s.percentage, 0) / attendance.length).toFixed(2)
     : 0;
+  const threshold = eligibility?.threshold ?? 75;
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-100">
@@ -100,14 +103,14 @@ export default function StudentDashboard({ user, onLogout }) {
         </div>
 
         {/* Low Attendance Alert */}
-        {attendance.some(s => s.percentage < 75) && (
+        {attendance.some(s => !s.eligible) && (
           <div className="bg-yellow-50 border-l-4 border-yellow-400 p-4 mb-6 rounded-r-lg" data-testid="low-attendance-alert">
             <div className="flex items-start">
               <AlertCircle className="w-5 h-5 text-yellow-600 mt-0.5 mr-3" />
               <div>
                 <h3 className="text-sm font-medium text-yellow-800">Low Attendance Warning</h3>
                 <p className="text-sm text-yellow-700 mt-1">
-                  You have subjects with attendance below 75%. Please attend classes regularly to maintain eligibility.
+                  You have subjects with attendance below {threshold}%. Please attend classes regularly to maintain eligibility.
                 </p>
               </div>
             </div>
@@ -143,7 +146,7 @@ export default function StudentDashboard({ user, onLogout }) {
                         <td>{subject.total_classes}</td>
                         <td>{subject.attended}</td>
                         <td>
-                          <span className={`font-bold ${subject.percentage >= 75 ? 'text-green-600' : 'text-red-600'}`}>
+                          <span className={`font-bold ${subject.eligible ? 'text-green-600' : 'text-red-600'}`}>
                             {subject.percentage}%
                           </span>
                         </td>
@@ -161,13 +164,48 @@ export default function StudentDashboard({ user, onLogout }) {
           </CardContent>
         </Card>
 
+        {/* Archived terms */}
+        {history.length > 0 && (
+          <Card className="mt-6" data-testid="history-card">
+            <CardHeader>
+              <CardTitle>Previous Terms</CardTitle>
+            </CardHeader>
+            <CardContent>
+              <div className="table-container">
+                <table>
+                  <thead>
+                    <tr>
+                      <th>Term</th>
+                      <th>Subject</th>
+                      <th>Total Classes</th>
+                      <th>Attended</th>
+                      <th>Percentage</th>
+                    </tr>
+                  </thead>
+                  <tbody>
+                    {history.flatMap((term) => term.subjects.map((subject) => (
+                      <tr key={`${term.term}-${subject.subject_id}`}>
+                        <td>{term.term}</td>
+                        <td>{subject.subject_name || subject.subject_id}</td>
+                        <td>{subject.total_classes}</td>
+                        <td>{subject.attended}</td>
+                        <td>{subject.percentage}%</td>
+                      </tr>
+                    )))}
+                  </tbody>
+                </table>
+              </div>
+            </CardContent>
+          </Card>
+        )}
+
         {/* Info Section */}
         <Card className="mt-6">
           <CardContent className="pt-6">
             <div className="bg-blue-50 p-4 rounded-lg">
               <h3 className="font-semibold text-blue-900 mb-2">Attendance Policy</h3>
               <ul className="text-sm text-blue-800 space-y-1">
-                <li>• Minimum 75% attendance required for exam eligibility</li>
+                <li>• Minimum {threshold}% attendance required for exam eligibility</li>
                 <li>• Attend classes regularly to maintain good standing</li>
                 <li>• Contact faculty for any attendance-related queries</li>
               </ul>
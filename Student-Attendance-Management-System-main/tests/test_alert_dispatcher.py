@@ -0,0 +1,203 @@
+"""AlertDispatcher against a local aiosmtpd server.
+
+Run from the project root with `python -m pytest tests`.
+"""
+import asyncio
+import socket
+import sys
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from alert_dispatcher import AlertDispatcher, SMTPSettings, _Worker  # noqa: E402
+
+
+class RecordingHandler:
+    """Counts sessions and messages; drops the connection on the first `drop` DATA commands"""
+
+    def __init__(self, drop: int = 0):
+        self.sessions = 0
+        self.messages = []
+        self.drop = drop
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.drop:
+            self.drop -= 1
+            server.transport.close()
+            return "421 Closing connection"
+        self.messages.append(envelope.rcpt_tos[0])
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smtp_server(handler, port: int) -> Controller:
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller
+
+
+def alerts(count: int) -> list:
+    return [(f"student{i}@example.edu", f"Student {i}", "Networks", 60.0) for i in range(count)]
+
+
+async def dispatch(dispatcher: AlertDispatcher, batch: list):
+    run = await dispatcher.submit(batch)
+    await dispatcher.join()
+    return run
+
+
+def settings(port: int) -> SMTPSettings:
+    return SMTPSettings("127.0.0.1", port, user="noreply@example.edu", starttls=False, timeout=5, auth=False)
+
+
+class MemoryStore:
+    """The two collection methods the dispatcher uses, over a dict"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["run_id"], {}).update(update["$set"])
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["run_id"])
+        return {k: v for k, v in doc.items() if k != "expires_at"} if doc else None
+
+
+def test_queued_alerts_reuse_one_session_per_worker():
+    port = free_port()
+    handler = RecordingHandler()
+    controller = smtp_server(handler, port)
+
+    async def scenario():
+        dispatcher = AlertDispatcher(settings(port), workers=2, backoff=0.01)
+        await dispatcher.start()
+        try:
+            return await dispatch(dispatcher, alerts(20))
+        finally:
+            await dispatcher.stop()
+
+    try:
+        run = asyncio.run(scenario())
+    finally:
+        controller.stop()
+
+    assert run.to_dict()["sent"] == 20
+    assert run.finished_at is not None
+    assert sorted(handler.messages) == sorted(to for to, *_ in alerts(20))
+    assert handler.sessions == 2
+
+
+def test_dropped_send_is_retried_on_a_new_session():
+    port = free_port()
+    handler = RecordingHandler(drop=1)
+    controller = smtp_server(handler, port)
+
+    async def scenario():
+        dispatcher = AlertDispatcher(settings(port), workers=1, backoff=0.01)
+        await dispatcher.start()
+        try:
+            return await dispatch(dispatcher, alerts(3))
+        finally:
+            await dispatcher.stop()
+
+    try:
+        run = asyncio.run(scenario())
+    finally:
+        controller.stop()
+
+    assert (run.sent, run.failed, run.retries) == (3, 0, 1)
+    assert handler.sessions == 2
+
+
+def test_idle_session_dropped_by_server_is_reopened_without_a_retry(monkeypatch):
+    monkeypatch.setattr(_Worker, "IDLE_PROBE_AFTER", 0.0)
+    port = free_port()
+    handler = RecordingHandler()
+
+    async def scenario():
+        dispatcher = AlertDispatcher(settings(port), workers=1, backoff=0.01)
+        await dispatcher.start()
+        try:
+            controller = smtp_server(handler, port)
+            first = await dispatch(dispatcher, alerts(1))
+            # The server goes away while the worker's session sits idle
+            controller.stop()
+            controller = smtp_server(handler, port)
+            second = await dispatch(dispatcher, alerts(2))
+            controller.stop()
+            return first, second
+        finally:
+            await dispatcher.stop()
+
+    first, second = asyncio.run(scenario())
+
+    assert (first.sent, second.sent) == (1, 2)
+    assert second.retries == 0
+    assert handler.sessions == 2
+
+
+def test_unreachable_server_fails_after_retries():
+    async def scenario():
+        dispatcher = AlertDispatcher(settings(free_port()), workers=1, max_retries=2, backoff=0.01)
+        await dispatcher.start()
+        try:
+            return await dispatch(dispatcher, alerts(1))
+        finally:
+            await dispatcher.stop()
+
+    run = asyncio.run(scenario())
+
+    assert (run.sent, run.failed, run.retries) == (0, 1, 2)
+    assert run.errors[0]["to"] == "student0@example.edu"
+
+
+def test_run_counters_are_readable_from_another_worker():
+    port = free_port()
+    controller = smtp_server(RecordingHandler(), port)
+    store = MemoryStore()
+
+    async def scenario():
+        dispatcher = AlertDispatcher(settings(port), workers=1, backoff=0.01, store=lambda: store)
+        other = AlertDispatcher(settings(port), store=lambda: store)
+        await dispatcher.start()
+        try:
+            run = await dispatch(dispatcher, alerts(3))
+            return run, await other.run_status(run.id), await other.run_status("missing")
+        finally:
+            await dispatcher.stop()
+
+    try:
+        run, status, missing = asyncio.run(scenario())
+    finally:
+        controller.stop()
+
+    assert status == run.to_dict()
+    assert status["sent"] == 3 and status["finished_at"] is not None
+    assert missing is None
+
+
+def test_user_without_password_is_not_configured_when_auth_is_required():
+    async def scenario():
+        dispatcher = AlertDispatcher(SMTPSettings("127.0.0.1", free_port(), user="noreply@example.edu"), workers=1)
+        await dispatcher.start()
+        try:
+            return await dispatch(dispatcher, alerts(2))
+        finally:
+            await dispatcher.stop()
+
+    run = asyncio.run(scenario())
+
+    assert (run.skipped, run.sent, run.retries) == (2, 0, 0)
@@ -0,0 +1,65 @@
+"""project_eligibility against a per-student reference calculation."""
+import sys
+from itertools import product
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from eligibility import course_threshold, project_eligibility  # noqa: E402
+
+
+def reference(attended: int, held: int, threshold: float, remaining: int):
+    """Smallest number of the remaining classes to attend, by trying each one"""
+    percentage = attended / held * 100 if held else 0.0
+    for needed in range(remaining + 1):
+        if (attended + needed) * 100 >= threshold * (held + remaining):
+            return percentage, needed, True
+    return percentage, remaining + 1, False
+
+
+def test_matches_reference_for_every_small_case():
+    for held, remaining, threshold in product(range(1, 13), range(0, 9), (0, 60, 75, 100, 66.67)):
+        attended = list(range(held + 1))
+        present = pd.DataFrame({"sub": attended}, index=[f"stu{a}" for a in attended])
+        result = project_eligibility(present, pd.Series({"sub": held}), threshold, remaining)
+        for a in attended:
+            percentage, needed, reachable = reference(a, held, threshold, remaining)
+            student = f"stu{a}"
+            assert result["percentage"].loc[student, "sub"] == percentage
+            assert result["eligible"].loc[student, "sub"] == (percentage >= threshold)
+            assert result["reachable"].loc[student, "sub"] == reachable, (a, held, threshold, remaining)
+            if reachable:
+                assert result["classes_needed"].loc[student, "sub"] == needed, (a, held, threshold, remaining)
+            else:
+                assert result["classes_needed"].loc[student, "sub"] > remaining
+
+
+def test_exact_threshold_is_not_pushed_up_by_float_noise():
+    # Exactly at the threshold (3 of 4 at 75%, 7 of 10 at 70%) needs no further classes
+    present = pd.DataFrame({"a": [3], "b": [7]}, index=["stu"])
+    result = project_eligibility(present, pd.Series({"a": 4, "b": 10}), 75, 0)
+    assert bool(result["eligible"].loc["stu", "a"])
+    assert result["classes_needed"].loc["stu", "a"] == 0
+    result = project_eligibility(present, pd.Series({"a": 4, "b": 10}), 70, 0)
+    assert result["classes_needed"].loc["stu", "b"] == 0
+
+
+def test_subjects_without_sessions_and_missing_totals():
+    present = pd.DataFrame({"held": [2], "none": [0], "unknown": [0]}, index=["stu"])
+    result = project_eligibility(present, pd.Series({"held": 4, "none": 0}), 75, 2)
+    assert result["percentage"].loc["stu", "none"] == 0.0
+    assert result["percentage"].loc["stu", "unknown"] == 0.0
+    assert not result["eligible"].loc["stu", "none"]
+    # Nothing held yet: both upcoming classes are needed to reach 75%
+    assert result["classes_needed"].loc["stu", "unknown"] == 2
+    assert result["classes_needed"].loc["stu", "held"] == 3
+    assert not result["reachable"].loc["stu", "held"]
+
+
+def test_course_threshold_falls_back_to_the_environment(monkeypatch):
+    monkeypatch.setenv("ATTENDANCE_THRESHOLD", "80")
+    assert course_threshold({"attendance_threshold": 60}) == 60.0
+    assert course_threshold({"attendance_threshold": None}) == 80.0
+    assert course_threshold(None) == 80.0
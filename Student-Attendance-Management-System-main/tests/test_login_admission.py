@@ -0,0 +1,119 @@
+"""Token buckets and admission checks for logins."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import login_admission  # noqa: E402
+from login_admission import AdmissionBackend, AdmissionRejected, LoginAdmission, MemoryBackend, client_ip  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(login_admission.time, "monotonic", clock)
+    return clock
+
+
+def take(backend, key, rate, burst):
+    return asyncio.run(backend.take(key, rate, burst))
+
+
+def test_burst_is_available_at_once_then_refused(clock):
+    backend = MemoryBackend()
+    assert [take(backend, "k", 1.0, 3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert take(backend, "k", 1.0, 3) == pytest.approx(1.0)
+
+
+def test_tokens_refill_at_rate_up_to_burst(clock):
+    backend = MemoryBackend()
+    for _ in range(2):
+        take(backend, "k", 0.5, 2)
+    clock.now += 1
+    # Half a token has refilled, so the next whole one is a second away
+    assert take(backend, "k", 0.5, 2) == pytest.approx(1.0)
+    clock.now += 100
+    assert [take(backend, "k", 0.5, 2) for _ in range(3)] == [0.0, 0.0, pytest.approx(2.0)]
+
+
+def test_refused_takes_do_not_consume(clock):
+    backend = MemoryBackend()
+    take(backend, "k", 1.0, 1)
+    for _ in range(5):
+        take(backend, "k", 1.0, 1)
+    clock.now += 1
+    assert take(backend, "k", 1.0, 1) == 0.0
+
+
+def test_zero_rate_waits_a_minute(clock):
+    backend = MemoryBackend()
+    take(backend, "k", 0.0, 1)
+    assert take(backend, "k", 0.0, 1) == 60.0
+
+
+def test_least_recently_used_keys_are_dropped(clock):
+    backend = MemoryBackend(max_keys=2)
+    take(backend, "a", 1.0, 1)
+    take(backend, "b", 1.0, 1)
+    take(backend, "a", 1.0, 1)
+    take(backend, "c", 1.0, 1)
+    assert len(backend) == 2
+    # "b" was evicted, so it starts from a full bucket again
+    assert take(backend, "b", 1.0, 1) == 0.0
+
+
+def test_backend_must_implement_take():
+    with pytest.raises(TypeError):
+        AdmissionBackend()
+
+
+def test_admit_limits_per_ip_and_per_college_id(clock):
+    admission = LoginAdmission(ip_per_minute=60, ip_burst=3, id_per_minute=60, id_burst=2)
+
+    asyncio.run(admission.admit("STU1", "1.1.1.1"))
+    asyncio.run(admission.admit("stu1", "1.1.1.1"))
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(admission.admit("STU1", "1.1.1.1"))
+    assert rejected.value.reason == "college_id"
+    assert rejected.value.retry_after == 1
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(admission.admit("STU2", "1.1.1.1"))
+    assert rejected.value.reason == "ip"
+    asyncio.run(admission.admit("STU2", "2.2.2.2"))
+    assert admission.rejected == {"ip": 1, "college_id": 1, "busy": 0}
+
+
+def test_verification_slots_are_capped_and_released():
+    admission = LoginAdmission(max_verifications=1)
+    with admission.verification():
+        with pytest.raises(AdmissionRejected) as rejected:
+            with admission.verification():
+                pass
+        assert rejected.value.reason == "busy"
+    with admission.verification():
+        assert admission.in_flight == 1
+    assert admission.in_flight == 0
+
+
+class Peer:
+    host = "10.0.0.1"
+
+
+def test_client_ip_counts_trusted_hops_from_the_right():
+    assert client_ip(Peer, "6.6.6.6, 1.2.3.4", 1) == "1.2.3.4"
+    assert client_ip(Peer, "6.6.6.6, 1.2.3.4, 10.0.0.2", 2) == "1.2.3.4"
+    assert client_ip(Peer, "1.2.3.4", 3) == "1.2.3.4"
+    assert client_ip(Peer, "6.6.6.6", 0) == "10.0.0.1"
+    assert client_ip(None, None, 1) == "unknown"
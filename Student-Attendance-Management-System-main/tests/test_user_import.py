@@ -0,0 +1,62 @@
+"""csv_rows: incremental CSV record splitting across chunk boundaries."""
+import asyncio
+import csv
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from user_import import csv_rows  # noqa: E402
+
+SAMPLE = (
+    "\ufeffcollege_id,name,email,password,role\r\n"
+    "STU1,\"Doe, Jane\",jane@example.edu,pw1,student\r\n"
+    "\r\n"
+    "STU2,\"Quote \"\"Q\"\" Smith\",q@example.edu,pw2,student\r\n"
+    "STU3,\"Line one\nline two\",l@example.edu,pw3,student\n"
+    "STU4,Zoë Ñúñez,z@example.edu,pw4,faculty"
+)
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def rows(data: bytes, size: int) -> list:
+    async def collect():
+        return [row async for row in csv_rows(chunked(data, size))]
+    return asyncio.run(collect())
+
+
+def expected() -> list:
+    text = SAMPLE.lstrip("\ufeff").replace("\r\n", "\n")
+    return [cells for cells in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in cells)]
+
+
+def test_rows_match_csv_module_for_every_chunk_size():
+    data = SAMPLE.encode("utf-8")
+    for size in (1, 2, 3, 7, 64, len(data)):
+        assert [cells for _, cells in rows(data, size)] == expected(), size
+
+
+def test_line_numbers_point_at_the_first_line_of_each_record():
+    lines = [line for line, _ in rows(SAMPLE.encode("utf-8"), 5)]
+    assert lines == [1, 2, 4, 5, 7]
+
+
+def test_bom_and_multibyte_characters_split_across_chunks():
+    data = SAMPLE.encode("utf-8")
+    header = rows(data, 1)[0][1]
+    assert header[0] == "college_id"
+    assert rows(data, 1)[-1][1][1] == "Zoë Ñúñez"
+
+
+def test_blank_lines_and_trailing_newline_yield_nothing():
+    assert rows(b"\n\r\n  \n", 2) == []
+    assert rows(b"a,b\n\n", 3) == [(1, ["a", "b"])]
+
+
+def test_unterminated_quote_is_flushed_at_the_end():
+    assert rows(b'a,"open\nstill open', 4) == [(1, ["a", "open\nstill open"])]